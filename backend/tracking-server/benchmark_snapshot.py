@@ -0,0 +1,118 @@
+"""
+투표 인덱스 메모리/조회 시간 벤치마크 (예전 dict 인덱스 vs MemberVotes/VoteRecord).
+표결 API row와 같은 필드(23개)를 가진 합성 데이터로 의원 x 의안 만큼 표결을 만들어 비교한다.
+
+실행 경로 : `cd backend/tracking-server`
+- 기본 (300명 x 600건 = 18만 표결): `python benchmark_snapshot.py`
+- 크기 지정: `python benchmark_snapshot.py --members 300 --bills 1500`
+"""
+import argparse
+import itertools
+import json
+import time
+import tracemalloc
+
+import server
+
+COMMITTEES = ["법제사법위원회", "기획재정위원회", "행정안전위원회", "보건복지위원회", "국토교통위원회"]
+RESULTS = ["찬성", "반대", "기권", "불참"]
+
+
+def roll_call_rows(members, bills):
+    """표결 API 응답처럼 row마다 문자열 객체가 따로 생기도록 JSON을 한 번 거쳐서 만든다."""
+    for b in range(bills):
+        details = {"details": "본문 " * 200 + str(b), "summary": "요약 " * 30}
+        for m in range(members):
+            row = {
+                "HG_NM": f"의원{m}", "HG_NM_HAN": f"議員{m}", "POLY_NM": f"정당{m % 5}", "ORIG_NM": f"지역{m}",
+                "MEMBER_NO": str(m), "POLY_CD": f"P{m % 5}", "ORIG_CD": f"O{m}",
+                "VOTE_DATE": f"2024{1 + b % 12:02d}{1 + b % 28:02d} 1435",
+                "BILL_NO": str(2200000 + b), "BILL_NAME": f"어떤 법률 일부개정법률안 {b}",
+                "BILL_ID": "PRC_" + str(b).zfill(20), "LAW_TITLE": f"어떤 법률{b}",
+                "CURR_COMMITTEE": COMMITTEES[b % 5], "RESULT_VOTE_MOD": RESULTS[(b + m) % 4],
+                "DEPT_CD": f"D{m}", "CURR_COMMITTEE_ID": f"C{b % 5}", "DISP_ORDER": m,
+                "BILL_URL": f"https://x/{b}", "BILL_NAME_URL": f"https://y/{b}",
+                "SESSION_CD": 414, "CURRENTS_CD": 1, "AGE": 22, "MONA_CD": f"MC{m}",
+            }
+            row = json.loads(json.dumps(row, ensure_ascii=False))
+            row["DETAILS"] = details
+            yield row
+
+
+def build_dict_index(members, bills):
+    # 예전 방식: 의원명 -> {bill_id: 표결 API row 전체}
+    index = {}
+    for vote in roll_call_rows(members, bills):
+        index.setdefault(vote["HG_NM"], {})[vote["BILL_ID"]] = vote
+    return index
+
+
+def build_compact_index(members, bills):
+    index = build_dict_index(members, bills)
+    return {member: server.MemberVotes(votes.values()) for member, votes in index.items()}
+
+
+def measure_memory(build, members, bills):
+    tracemalloc.start()
+    index = build(members, bills)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return index, current / 2 ** 20
+
+
+class OrderedList(list):
+    """예전 방식의 최신순 목록을 vote_page에 그대로 넘기기 위한 어댑터 (결과별 인덱스 없음)."""
+
+    def ordered(self, results=()):
+        return self
+
+
+def timed(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="vote index memory / lookup benchmark")
+    parser.add_argument("--members", type=int, default=300)
+    parser.add_argument("--bills", type=int, default=600)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    old_index, old_mb = measure_memory(build_dict_index, args.members, args.bills)
+    server.shared_vote_details.clear()
+    new_index, new_mb = measure_memory(build_compact_index, args.members, args.bills)
+    print(f"votes: {args.members * args.bills}")
+    print(f"memory (MB)              before={old_mb:8.1f}  after={new_mb:8.1f}")
+
+    member = "의원7"
+    old_votes = OrderedList(sorted(old_index[member].values(), key=server.vote_sort_key, reverse=True))
+    new_votes = new_index[member]
+    bill_id = "PRC_" + str(args.bills - 1).zfill(20)
+
+    cases = [
+        ("result filter page (us)", server.vote_filter({"반대"}, None, None, None), {"반대"}),
+        ("date filter page (us)", server.vote_filter(set(), None, "20240601", None), ()),
+    ]
+    for label, matches, results in cases:
+        before = timed(lambda: server.vote_page(old_votes, matches, 50, None), args.repeat)
+        after = timed(lambda: server.vote_page(new_votes, matches, 50, None, results), args.repeat)
+        old_page = [vote["BILL_ID"] for vote in server.vote_page(old_votes, matches, 50, None)[0]]
+        new_page = [vote["BILL_ID"] for vote in server.vote_page(new_votes, matches, 50, None, results)[0]]
+        assert old_page == new_page, label
+        print(f"{label:24} before={before:8.1f}  after={after:8.1f}")
+
+    before = timed(lambda: next(v for v in old_index[member].values() if v["BILL_ID"] == bill_id), args.repeat)
+    after = timed(lambda: new_votes.by_bill[bill_id], args.repeat)
+    print(f"{'bill lookup scan (us)':24} before={before:8.1f}  after={after:8.3f}")
+
+    sample = next(itertools.islice(new_votes, 1))
+    assert server.project_record("votes", sample, "full", ()) == {
+        field: old_index[member][sample.BILL_ID][field] for field in server.VoteRecord.FIELDS
+    }
+
+
+if __name__ == "__main__":
+    main()
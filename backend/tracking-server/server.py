@@ -1,27 +1,43 @@
+import time
+# 모듈 import에 걸린 시간도 시작 시간 리포트에 넣는다.
+MODULE_LOAD_STARTED = time.perf_counter()
+
 import os
 import sys
 import re
+import json
+import math
+import gzip
+import heapq
+import base64
+import itertools
+import hashlib
 import random
-import requests
+import httpx
 import asyncio
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from fastapi_utils.tasks import repeat_every
-from sqlalchemy import and_ 
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.options import Options
 from datetime import datetime, timedelta
-from openai import AsyncClient
-from cachetools import TTLCache
+from cachetools import TTLCache, LRUCache
 from databases import Database
-from sqlalchemy import create_engine, MetaData, Table, Column, Integer, String, Text
+from sqlalchemy import MetaData, Table, Column, Integer, String, Text, Index
+from sqlalchemy import select, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.schema import CreateTable
+# bs4(크롤링)와 openai(요약)는 수집할 때만 필요하므로 쓰는 곳에서 import한다.
+
+# 응답 스냅샷 직렬화/압축. 설치돼 있지 않으면 표준 json / gzip만 쓴다.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 load_dotenv()
 
@@ -50,9 +66,21 @@ bills_table = Table(
     Column("committee", String(200)),
     Column("proposer", String(200)),
     Column("bill_link", String(300)),
-    Column("details", Text),
+    Column("details", Text),  # 예전 데이터 호환용. 본문/요약은 bill_text에 저장한다.
     Column("summary", Text),
     Column("proc_dt", String(100)),
+    Index("uq_bills_bill_id", "bill_id", unique=True),
+)
+
+# 의안 본문/요약. 의안당 한 번만 저장하고 votes/bills는 bill_id로 참조한다.
+bill_text_table = Table(
+    "bill_text",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("bill_id", String(100)),
+    Column("details", Text),
+    Column("summary", Text),
+    Index("uq_bill_text_bill_id", "bill_id", unique=True),
 )
 
 votes_table = Table(
@@ -61,12 +89,82 @@ votes_table = Table(
     Column("id", Integer, primary_key=True),
     Column("bill_id", String(100), index=True),
     Column("vote_result", String(50)),  # 예: 가결/부결/찬성/반대 등
-    Column("m_name", String(100)),      # 의원 이름
-    Column("details", Text),            # 크롤링 결과(DETAILS)
+    Column("m_name", String(100), index=True),  # 의원 이름
+    Column("details", Text),            # 예전 데이터 호환용. 크롤링 결과는 bill_text에 있다.
+    Column("bill_no", String(100)),
+    Column("bill_name", String(300)),
+    Column("vote_date", String(100)),
+    Column("committee", String(200)),
+    Column("bill_url", String(300)),
+    Column("mona_cd", String(50)),  # 의원코드. 공동발의 조회 때 의원 목록 API 대신 쓸 수 있다.
+    Index("uq_votes_bill_member", "bill_id", "m_name", unique=True),
+    # 의원별 찬성/반대/기권 필터와 집계용
+    Index("ix_votes_member_result_bill", "m_name", "vote_result", "bill_id"),
+)
+
+# 의원별 발의 법안 목록 (대표/공동발의 구분). 같은 법안이 여러 의원에게 걸릴 수 있어 bills와 분리.
+member_bills_table = Table(
+    "member_bills",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("m_name", String(100)),
+    Column("bill_id", String(100)),
+    Column("bill_type", String(50)),
+    Index("uq_member_bills_member_bill", "m_name", "bill_id", unique=True),
+)
+
+# 웹에서 요청된 의원 목록. 수집 워커가 이 목록의 의원들을 함께 수집한다.
+tracked_members_table = Table(
+    "tracked_members",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("m_name", String(100)),
+    Column("requested_at", String(100)),
+    Index("uq_tracked_members_m_name", "m_name", unique=True),
+)
+
+# 요약 결과 영구 저장소: (상세 내용 + 프롬프트/모델 버전) 해시 -> 요약
+bill_summaries_table = Table(
+    "bill_summaries",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("content_hash", String(64)),
+    Column("model", String(100)),
+    Column("prompt_version", String(50)),
+    Column("summary", Text),
+    Column("created_at", String(100)),
+    Index("uq_bill_summaries_content_hash", "content_hash", unique=True),
+)
+
+# 의원별 표결 집계 (표결 결과 x 위원회 x 월). 수집이 votes를 바꿀 때 바뀐 만큼만 증감한다.
+vote_stats_table = Table(
+    "vote_stats",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("m_name", String(100)),
+    Column("vote_result", String(50)),
+    Column("committee", String(200)),
+    Column("month", String(6)),  # YYYYMM
+    Column("count", Integer),
+    Index("uq_vote_stats_bucket", "m_name", "vote_result", "committee", "month", unique=True),
+)
+
+# 증분 동기화 워터마크: source -> 마지막으로 반영한 처리일/제안일
+sync_state_table = Table(
+    "sync_state",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("source", String(200)),
+    Column("watermark", String(100)),
+    Column("updated_at", String(100)),
+    Index("uq_sync_state_source", "source", unique=True),
 )
 
 cache = TTLCache(maxsize=10000, ttl=14400)
 
+# bulk upsert 한 번에 보내는 row 수
+UPSERT_BATCH_SIZE = 500
+
 
 vote_data_loaded = False
 bills_data_loaded = False
@@ -78,11 +176,18 @@ API_KEY = os.getenv("API_KEY")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
 bills_url = "https://open.assembly.go.kr/portal/openapi/nzmimeepazxkubdpn"
+vote_url = "https://open.assembly.go.kr/portal/openapi/nojepdqqaweusdfbi"
+member_info_url = "https://open.assembly.go.kr/portal/openapi/nwvrqwxyaytdsfvhu"
+bill_list_url = "https://open.assembly.go.kr/portal/openapi/nwbpacrgavhjryiph"
 headers = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/87.0.4280.88 Safari/537.36"
 }
 
 app = FastAPI()
+
+# 시작 단계별 소요 시간(ms). /status에서 확인할 수 있다.
+startup_timings = {"import": round((time.perf_counter() - MODULE_LOAD_STARTED) * 1000, 1)}
+startup_state = {"schema_ready": None}
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 app.add_middleware(
@@ -97,222 +202,2146 @@ vote_data_loaded = False
 bills_data_loaded = False
 
 last_refresh_date = None
-REFRESH_HOUR = 4  # 새벽 4시
+REFRESH_HOUR = int(os.getenv("REFRESH_HOUR", "4"))  # 새벽 4시
+
+# 스키마 준비 실패 시 재시도 간격 상한
+SCHEMA_RETRY_MAX_SECONDS = 60
+
+# INGEST_IN_WEB=0이면 웹 프로세스는 수집하지 않고 DB만 읽는다. 수집은 worker.py가 따로 돌린다.
+INGEST_IN_WEB = os.getenv("INGEST_IN_WEB", "1") == "1"
+SNAPSHOT_RELOAD_SECONDS = int(os.getenv("SNAPSHOT_RELOAD_SECONDS", "300"))
+
+# SSE(/api/events) 구독자별 이벤트 큐. 느린 구독자는 오래된 이벤트부터 버린다.
+SSE_QUEUE_SIZE = 100
+SSE_KEEPALIVE_SECONDS = 15
+event_subscribers = set()
+
+# 수집 중인 데이터셋의 중간 결과: (dataset, 의원 또는 "*") -> {"progress", "records"}
+partial_results = {}
+PROGRESS_EVENT_EVERY = 50
+
+# DB에서 불러온 마지막 스냅샷을 서비스 중이면 True (라이브 수집이 끝나면 False)
+data_stale = {"votes": False, "bills": False}
+
+# 백그라운드 갱신 상태 (/status에 노출)
+refresh_state = {
+    "running": False,
+    "stage": None,
+    "done": 0,
+    "total": 0,
+    "started_at": None,
+    "last_success": None,
+    "last_error": None,
+    "failed_steps": {},  # "dataset:의원" -> 마지막 갱신에서 난 오류
+    "next_run": None,
+}
+
+# 투표 수집 방식
+# - "rollcall": 의안별 전체 표결을 한 번만 받아 모든 의원의 투표를 인덱싱
+# - "member": 기존 방식 (의안마다 HG_NM=의원명으로 호출)
+VOTE_FETCH_MODE = os.getenv("VOTE_FETCH_MODE", "rollcall")
+
+# 의원명 -> MemberVotes (최신순 목록 + BILL_ID/표결 결과별 인덱스) 형태의 (bill_id, 의원) 투표 인덱스
+vote_index = {}
+
+# 서버 시작 시 미리 불러올 의원. 다른 의원은 첫 요청 때 불러온다.
+DEFAULT_MEMBER = os.getenv("DEFAULT_MEMBER", "곽상언")
+
+# 의원명 -> 국회 홈페이지 의원코드(monaCd)
+member_registry = {}
+# 의원 목록은 이 주기보다 자주 다시 받지 않고, 목록에 없던 이름도 그동안은 다시 찾지 않는다.
+MEMBER_REGISTRY_TTL_SECONDS = int(os.getenv("MEMBER_REGISTRY_TTL_SECONDS", "3600"))
+member_registry_loaded_at = None
+unknown_members = TTLCache(maxsize=1000, ttl=MEMBER_REGISTRY_TTL_SECONDS)
+
+# 의원별 데이터 캐시: 의원명 -> {"votes": MemberVotes, "bills": [BillRecord, ...]}. 최근에 안 쓴 의원부터 밀려난다.
+MEMBER_CACHE_SIZE = int(os.getenv("MEMBER_CACHE_SIZE", "50"))
+member_cache = LRUCache(maxsize=MEMBER_CACHE_SIZE)
+
+# 발의 법안 수집 파이프라인 설정 (목록 -> 크롤링 -> 요약 -> 저장)
+PIPELINE_QUEUE_SIZE = 32
+BILLS_CRAWL_CONCURRENCY = int(os.getenv("BILLS_CRAWL_CONCURRENCY", "8"))
+BILLS_SUMMARIZE_CONCURRENCY = int(os.getenv("BILLS_SUMMARIZE_CONCURRENCY", "16"))
+BILLS_PERSIST_BATCH_SIZE = 25
+
+# 의안 크롤링/요약 우선순위 큐의 동시 처리 수 (모든 수집 경로가 공유)
+CRAWL_QUEUE_CONCURRENCY = int(os.getenv("CRAWL_QUEUE_CONCURRENCY", "8"))
+SUMMARY_QUEUE_CONCURRENCY = int(os.getenv("SUMMARY_QUEUE_CONCURRENCY", "16"))
+
+# 파이프라인 이름 -> 마지막(또는 진행 중인) IngestPipeline (/status에 단계별 통계 노출)
+pipeline_stats = {}
+
+# 목록 API 응답 모양. summary는 본문(details) 없이 요약만, full은 저장된 그대로.
+LIST_VIEWS = ("summary", "full")
+
+# /api/vote_data 페이지 크기 상한
+VOTE_PAGE_MAX_LIMIT = 500
+
+# BILL_ID -> 표결 레코드들이 같이 쓰는 DETAILS dict (의원 수만큼 복사하지 않는다)
+shared_vote_details = {}
+
+# (dataset, 의원, view, fields) -> 직렬화된 응답 스냅샷. 데이터가 바뀌면 지우고 다음 요청 때 다시 만든다.
+SNAPSHOT_CACHE_SIZE = int(os.getenv("SNAPSHOT_CACHE_SIZE", "200"))
+response_snapshots = LRUCache(maxsize=SNAPSHOT_CACHE_SIZE)
+# 이보다 작은 응답 본문은 압축하지 않는다.
+COMPRESS_MIN_BYTES = 1024
+
+# single-flight: key -> 진행 중인 Future (갱신 작업, 의원별 로드, 의안별 크롤링)
+inflight = {}
+
+# 기본은 워터마크 이후 변경분만 가져오는 증분 동기화. FULL_SYNC=1이면 항상 전체 재수집.
+FULL_SYNC = os.getenv("FULL_SYNC", "0") == "1"
+
+# OpenAI 클라이언트는 첫 요약 요청 때 만든다 (읽기 전용 웹 프로세스는 openai를 import하지 않는다).
+openai_client = None
+
+
+def get_openai_client():
+    global openai_client
+    if openai_client is None:
+        from openai import AsyncClient
+        # SDK 자체 재시도는 끈다. 429 재시도/대기는 summary_limiter(request_chat_completion)만 담당한다.
+        openai_client = AsyncClient(api_key=OPENAI_API_KEY, max_retries=0)
+    return openai_client
+
+# 요약 프롬프트/모델. 바꾸면 SUMMARY_PROMPT_VERSION도 올려서 저장된 요약을 새로 만들게 한다.
+SUMMARY_MODEL = "gpt-4o-mini"
+SUMMARY_PROMPT = "법안 내용을 300자 이내로 요약. 핵심만 3-4줄로."
+SUMMARY_PROMPT_VERSION = "v1"
+SUMMARY_ERROR_MESSAGE = "요약 생성 중 오류가 발생했습니다."
+# 본문 크롤링 실패 시 임시로 채우는 요약. 이런 결과는 bill_text에 저장하지 않는다.
+SUMMARY_UNAVAILABLE = "요약 불가"
+
+# 여러 법안을 한 번의 요청으로 요약하는 배치 모드
+SUMMARY_BATCH_MODE = os.getenv("SUMMARY_BATCH_MODE", "1") == "1"
+SUMMARY_BATCH_PROMPT = (
+    "여러 법안이 JSON으로 주어진다. 각 법안 내용을 300자 이내로 요약. 핵심만 3-4줄로. "
+    '반드시 {"summaries": {"<bill_id>": "<요약>"}} 형식의 JSON으로만 답하고, 주어진 bill_id를 빠짐없이 포함할 것.'
+)
+SUMMARY_BATCH_TOKEN_BUDGET = int(os.getenv("SUMMARY_BATCH_TOKEN_BUDGET", "12000"))
+SUMMARY_BATCH_MAX_BILLS = int(os.getenv("SUMMARY_BATCH_MAX_BILLS", "8"))
+SUMMARY_BATCH_MAX_WAIT = 0.2  # 배치를 채우려고 기다리는 최대 시간(초)
+
+# OpenAI 요약 호출 한도 시작값 (응답 헤더의 실제 한도에 맞춰 조정됨)
+OPENAI_RPM = int(os.getenv("OPENAI_RPM", "500"))
+OPENAI_TPM = int(os.getenv("OPENAI_TPM", "200000"))
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+
+
+class SummaryRateLimiter:
+    """
+    OpenAI 요약 호출용 토큰 버킷 + AIMD 제한기.
+    요청 수/토큰 수 버킷을 모두 통과해야 호출할 수 있고, 성공하면 분당 한도를 조금씩 올리고
+    rate limit(429)을 맞으면 절반으로 줄인 뒤 retry-after 동안 모두 멈춘다.
+    응답의 x-ratelimit-* 헤더로 실제 한도와 남은 양을 반영한다.
+    """
+
+    HEADROOM = 0.9       # 헤더로 받은 한도의 90%까지만 사용
+    BURST_SECONDS = 10   # 버킷 크기: 10초 분량
+    MIN_RPM = 10
+    MIN_TPM = 10000
+
+    def __init__(self, rpm, tpm, max_concurrency):
+        self.rpm = float(rpm)
+        self.tpm = float(tpm)
+        self.max_rpm = float(rpm)
+        self.max_tpm = float(tpm)
+        self.max_concurrency = max_concurrency
+        self.request_tokens = 1.0
+        self.token_tokens = 0.0
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self.queue_depth = 0
+        self.in_flight = 0
+        self.throttle_events = 0
+        self.last_throttle_at = None
+        # asyncio 객체는 이벤트 루프 안에서 처음 쓸 때 만든다.
+        self.lock = None
+        self.semaphore = None
+
+    def _refill(self, now):
+        elapsed = now - self.updated_at
+        self.updated_at = now
+        self.request_tokens = min(
+            self.rpm / 60 * self.BURST_SECONDS,
+            self.request_tokens + elapsed * self.rpm / 60,
+        )
+        self.token_tokens = min(
+            self.tpm / 60 * self.BURST_SECONDS,
+            self.token_tokens + elapsed * self.tpm / 60,
+        )
+
+    def _reserve(self, estimated_tokens):
+        """버킷에서 1회 호출분을 꺼낸다. 꺼냈으면 0, 아니면 기다려야 할 초를 돌려준다."""
+        now = time.monotonic()
+        if now < self.paused_until:
+            return self.paused_until - now
+        self._refill(now)
+        if self.request_tokens >= 1 and self.token_tokens >= 0:
+            self.request_tokens -= 1
+            # 토큰 버킷은 음수가 될 수 있다. 큰 요청 뒤에는 그만큼 다음 호출이 늦어진다.
+            self.token_tokens -= estimated_tokens
+            return 0
+        wait_requests = max(0.0, 1 - self.request_tokens) / (self.rpm / 60)
+        wait_tokens = max(0.0, -self.token_tokens) / (self.tpm / 60)
+        return max(wait_requests, wait_tokens, 0.01)
+
+    async def acquire(self, estimated_tokens):
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+            self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.queue_depth += 1
+        try:
+            # 대기열은 lock 순서대로 하나씩 버킷을 통과한다.
+            async with self.lock:
+                while True:
+                    wait = self._reserve(estimated_tokens)
+                    if wait <= 0:
+                        break
+                    await asyncio.sleep(wait)
+            await self.semaphore.acquire()
+        finally:
+            self.queue_depth -= 1
+        self.in_flight += 1
+
+    def release(self):
+        self.in_flight -= 1
+        self.semaphore.release()
+
+    def pause(self, seconds):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def on_response(self, headers):
+        limit_requests = parse_int_header(headers.get("x-ratelimit-limit-requests"))
+        limit_tokens = parse_int_header(headers.get("x-ratelimit-limit-tokens"))
+        if limit_requests:
+            self.max_rpm = limit_requests * self.HEADROOM
+        if limit_tokens:
+            self.max_tpm = limit_tokens * self.HEADROOM
+
+        # additive increase: 성공할 때마다 한도의 2%씩 올린다.
+        self.rpm = min(self.max_rpm, self.rpm + self.max_rpm * 0.02)
+        self.tpm = min(self.max_tpm, self.tpm + self.max_tpm * 0.02)
+
+        # 남은 양이 바닥났으면 리셋 시각까지 멈춘다.
+        if parse_int_header(headers.get("x-ratelimit-remaining-requests")) == 0:
+            self.pause(parse_reset_header(headers.get("x-ratelimit-reset-requests")))
+        if parse_int_header(headers.get("x-ratelimit-remaining-tokens")) == 0:
+            self.pause(parse_reset_header(headers.get("x-ratelimit-reset-tokens")))
+
+    def on_rate_limited(self, retry_after):
+        # multiplicative decrease
+        self.rpm = max(self.MIN_RPM, self.rpm / 2)
+        self.tpm = max(self.MIN_TPM, self.tpm / 2)
+        self.throttle_events += 1
+        self.last_throttle_at = datetime.now().isoformat()
+        self.pause(retry_after)
+
+    def stats(self):
+        return {
+            "rpm": round(self.rpm),
+            "tpm": round(self.tpm),
+            "max_rpm": round(self.max_rpm),
+            "max_tpm": round(self.max_tpm),
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "throttle_events": self.throttle_events,
+            "last_throttle_at": self.last_throttle_at,
+        }
 
-client = AsyncClient(api_key=OPENAI_API_KEY)
+
+def parse_int_header(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_reset_header(value, default=1.0):
+    """x-ratelimit-reset-* 값("1s", "6m0s", "20ms" 등)을 초로 바꾼다."""
+    if not value:
+        return default
+    units = {"h": 3600, "m": 60, "s": 1, "ms": 0.001}
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value)
+    if not parts:
+        return default
+    return sum(float(number) * units[unit] for number, unit in parts)
+
+
+def rate_limit_retry_after(error, default=2.0):
+    response = getattr(error, "response", None)
+    if response is None:
+        return default
+    retry_after_ms = response.headers.get("retry-after-ms")
+    if retry_after_ms:
+        return float(retry_after_ms) / 1000
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return default
+
+
+def estimate_summary_tokens(content):
+    # 한글은 대략 글자당 1토큰 안팎. 프롬프트와 최대 300자 답변 몫을 더한다.
+    return len(content) + 500
+
+
+summary_limiter = SummaryRateLimiter(OPENAI_RPM, OPENAI_TPM, OPENAI_MAX_CONCURRENCY)
+
+# 외부 API/크롤링 호출용 공용 HTTP 클라이언트 (startup에서 열고 shutdown에서 닫음)
+HTTP_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+HTTP_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=60)
+HTTP_PER_HOST_LIMIT = int(os.getenv("HTTP_PER_HOST_LIMIT", "10"))
+
+http_client = None
+host_semaphores = {}
+
+# 열린국회정보 OpenAPI 페이지 수집 설정 (pSize 최대 1000)
+OPEN_API_MAX_PAGE_SIZE = 1000
+OPEN_API_PAGE_CONCURRENCY = int(os.getenv("OPEN_API_PAGE_CONCURRENCY", "4"))
+OPEN_API_PAGE_RETRIES = 3
 
 
 class QueryRequest(BaseModel):
     query: str
 
-def is_refresh_time(now: datetime) -> bool:
-    return now.hour == REFRESH_HOUR
+def next_refresh_time(now: datetime) -> datetime:
+    next_run = now.replace(hour=REFRESH_HOUR, minute=0, second=0, microsecond=0)
+    if next_run <= now:
+        next_run += timedelta(days=1)
+    return next_run
+
+
+async def open_http_client():
+    global http_client
+    http_client = httpx.AsyncClient(
+        headers=headers,
+        timeout=HTTP_TIMEOUT,
+        limits=HTTP_LIMITS,
+        follow_redirects=True,
+    )
+
+
+async def close_http_client():
+    global http_client
+    if http_client is not None:
+        await http_client.aclose()
+        http_client = None
+
+
+async def http_request(method, url, **kwargs):
+    """
+    공용 클라이언트로 요청을 보낸다. 호스트별 세마포어로 동시 연결 수를 제한해
+    국회 API/사이트에 한꺼번에 요청이 몰리지 않게 한다.
+    """
+    host = httpx.URL(url).host
+    semaphore = host_semaphores.get(host)
+    if semaphore is None:
+        semaphore = host_semaphores[host] = asyncio.Semaphore(HTTP_PER_HOST_LIMIT)
+    async with semaphore:
+        return await http_client.request(method, url, **kwargs)
+
+
+async def http_get(url, **kwargs):
+    return await http_request("GET", url, **kwargs)
+
+
+async def http_post(url, **kwargs):
+    return await http_request("POST", url, **kwargs)
+
+
+def parse_open_api_page(payload, service):
+    """
+    OpenAPI 응답({service: [{"head": [...]}, {"row": [...]}]})에서
+    (list_total_count, rows)를 꺼낸다. 데이터가 없으면 (0, []).
+    """
+    total_count = 0
+    rows = []
+    for section in payload.get(service) or []:
+        for head in section.get("head", []):
+            if "list_total_count" in head:
+                total_count = int(head["list_total_count"])
+        if "row" in section:
+            rows = section["row"]
+    return total_count, rows
+
+
+async def fetch_open_api_page(url, service, params, page_index, page_size):
+    for attempt in range(1, OPEN_API_PAGE_RETRIES + 1):
+        try:
+            response = await http_get(url, params={
+                **params,
+                "Type": "json",
+                "pIndex": page_index,
+                "pSize": page_size,
+            })
+            response.raise_for_status()
+            return parse_open_api_page(response.json(), service)
+        except Exception as e:
+            print(f"[fetch_open_api_page] {service} page {page_index} failed (attempt={attempt}): {e}")
+            if attempt == OPEN_API_PAGE_RETRIES:
+                raise
+            await asyncio.sleep(2 ** attempt)
+
+
+async def fetch_open_api_all(url, service, params, page_size=OPEN_API_MAX_PAGE_SIZE,
+                             concurrency=OPEN_API_PAGE_CONCURRENCY):
+    """
+    첫 페이지에서 전체 건수를 읽은 뒤 나머지 페이지를 동시에(최대 concurrency개) 가져온다.
+    결과 row는 페이지 순서대로 합쳐서 반환한다.
+    """
+    total_count, first_rows = await fetch_open_api_page(url, service, params, 1, page_size)
+    total_pages = math.ceil(total_count / page_size)
+    print(f"[fetch_open_api_all] {service}: total={total_count}, pages={total_pages}")
+    if total_pages <= 1:
+        return list(first_rows)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch_page(page_index):
+        async with semaphore:
+            _, rows = await fetch_open_api_page(url, service, params, page_index, page_size)
+            return rows
+
+    pages = await asyncio.gather(*[fetch_page(i) for i in range(2, total_pages + 1)])
+    all_rows = list(first_rows)
+    for rows in pages:
+        all_rows.extend(rows)
+    return all_rows
+
+
+def start_single_flight(key, coro_factory):
+    """
+    key에 해당하는 작업이 진행 중이면 그 Future를, 아니면 새로 시작한 Future를 돌려준다.
+    작업이 끝나면 inflight에서 빠지므로 다음 호출은 다시 새로 시작한다.
+    """
+    future = inflight.get(key)
+    if future is None:
+        future = asyncio.ensure_future(coro_factory())
+        inflight[key] = future
+
+        def on_done(done_future):
+            inflight.pop(key, None)
+            # 기다리는 쪽이 없어도 "exception was never retrieved" 경고가 나지 않게 꺼내 둔다.
+            if not done_future.cancelled():
+                done_future.exception()
+
+        future.add_done_callback(on_done)
+    return future
+
+
+async def single_flight(key, coro_factory):
+    # shield: 기다리던 요청 하나가 취소돼도 공유 중인 작업은 계속 진행한다.
+    return await asyncio.shield(start_single_flight(key, coro_factory))
+
+
+async def gather_or_cancel(*aws):
+    """
+    asyncio.gather와 같지만, 하나가 실패(또는 취소)되면 나머지를 취소하고 모두 끝날 때까지 기다린 뒤 예외를 올린다.
+    파이프라인 producer처럼 형제 작업이 혼자 남아 가득 찬 큐에서 영원히 기다리지 않게 할 때 쓴다.
+    """
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+PIPELINE_STOP = object()
+
+
+class IngestPipeline:
+    """
+    asyncio 단계(stage)들을 bounded queue로 연결한 수집 파이프라인.
+    각 단계는 자기 worker 수만큼 동시에 돌고, 다음 단계 큐가 가득 차면 기다린다(backpressure).
+    batch_size > 1인 단계는 큐에 쌓인 항목을 최대 batch_size개까지 묶어서 한 번에 처리한다.
+    """
+
+    def __init__(self, name, queue_size=PIPELINE_QUEUE_SIZE):
+        self.name = name
+        self.queue_size = queue_size
+        self.stages = []
+        self.produced = 0
+        self.started_at = None
+        self.started_monotonic = None
+        self.elapsed_seconds = 0.0
+        self.running = False
+
+    def add_stage(self, name, handler, concurrency=1, batch_size=1):
+        self.stages.append({
+            "name": name,
+            "handler": handler,
+            "concurrency": concurrency,
+            "batch_size": batch_size,
+            "in": 0,
+            "out": 0,
+            "failed": 0,
+            "busy_seconds": 0.0,
+        })
+        return self
+
+    async def run(self, produce):
+        """produce(put)가 첫 단계에 항목을 넣고, 모든 단계가 비워질 때까지 기다린다."""
+        pipeline_stats[self.name] = self
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in self.stages]
+        self.started_monotonic = time.monotonic()
+        self.started_at = datetime.now().isoformat()
+        self.running = True
+
+        async def put(item):
+            self.produced += 1
+            await queues[0].put(item)
+
+        stage_tasks = [asyncio.ensure_future(self._run_stage(i, queues)) for i in range(len(self.stages))]
+        try:
+            await produce(put)
+        finally:
+            for _ in range(self.stages[0]["concurrency"]):
+                await queues[0].put(PIPELINE_STOP)
+            await asyncio.gather(*stage_tasks)
+            self.elapsed_seconds = time.monotonic() - self.started_monotonic
+            self.running = False
+            print(f"[IngestPipeline] {self.name} finished: {self.stats()}")
+
+    async def _run_stage(self, index, queues):
+        stage = self.stages[index]
+        queue = queues[index]
+        next_queue = queues[index + 1] if index + 1 < len(queues) else None
+
+        async def worker():
+            while True:
+                item = await queue.get()
+                if item is PIPELINE_STOP:
+                    return
+                batch = [item]
+                stop = False
+                while len(batch) < stage["batch_size"] and not queue.empty():
+                    next_item = queue.get_nowait()
+                    if next_item is PIPELINE_STOP:
+                        stop = True
+                        break
+                    batch.append(next_item)
+
+                stage["in"] += len(batch)
+                started = time.monotonic()
+                processed = 0
+                try:
+                    if stage["batch_size"] > 1:
+                        outputs = await stage["handler"](batch) or []
+                    else:
+                        output = await stage["handler"](item)
+                        outputs = [] if output is None else [output]
+                    processed = len(batch)
+                except Exception as e:
+                    print(f"[IngestPipeline] {self.name}/{stage['name']} failed: {e}")
+                    stage["failed"] += len(batch)
+                    outputs = []
+                stage["busy_seconds"] += time.monotonic() - started
+                # 마지막 단계는 넘겨줄 곳이 없으므로 처리한 건수를 out으로 센다.
+                stage["out"] += len(outputs) if next_queue is not None else processed
+
+                if next_queue is not None:
+                    for output in outputs:
+                        await next_queue.put(output)
+                if stop:
+                    return
+
+        await asyncio.gather(*[worker() for _ in range(stage["concurrency"])])
+        if next_queue is not None:
+            for _ in range(self.stages[index + 1]["concurrency"]):
+                await next_queue.put(PIPELINE_STOP)
+
+    def stats(self):
+        elapsed = time.monotonic() - self.started_monotonic if self.running else self.elapsed_seconds
+        return {
+            "running": self.running,
+            "started_at": self.started_at,
+            "elapsed_seconds": round(elapsed, 2),
+            "produced": self.produced,
+            "stages": {
+                stage["name"]: {
+                    "concurrency": stage["concurrency"],
+                    "in": stage["in"],
+                    "out": stage["out"],
+                    "failed": stage["failed"],
+                    "busy_seconds": round(stage["busy_seconds"], 2),
+                    "per_second": round(stage["out"] / elapsed, 2) if elapsed else None,
+                }
+                for stage in self.stages
+            },
+        }
+
+
+class PriorityWorkQueue:
+    """
+    의안 단위 작업(크롤링, 요약)의 우선순위 큐.
+    사용자가 직접 요청한 의안 -> 의원 발의 법안 (bulk가 아닌 작업) -> 처음 시도하는 의안 -> 최신 의안 순으로 먼저 처리한다.
+    bulk=True는 전체 표결 수집처럼 양이 많은 백그라운드 작업이라, 날짜가 최신이어도 발의 법안보다 뒤로 간다.
+    같은 key가 이미 대기 중이면 작업을 새로 만들지 않고, 더 높은 우선순위로 들어오면 앞으로 당긴다.
+    """
+
+    def __init__(self, name, concurrency):
+        self.name = name
+        self.concurrency = concurrency
+        self.heap = []
+        self.jobs = {}
+        self.failures = {}
+        self.counter = itertools.count()
+        self.available = None
+        self.workers = []
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+
+    def priority(self, key, recency=None, requested=False, bulk=False):
+        # 작은 값이 먼저. 실패했던 의안은 새 작업에 밀리고, 같은 조건이면 최신(날짜가 큰) 의안이 먼저.
+        return (0 if requested else 1, 1 if bulk else 0, 1 if self.failures.get(key) else 0,
+                -int(date_key(recency) or 0))
+
+    def submit(self, key, factory, recency=None, requested=False, bulk=False):
+        """factory()를 큐에 넣고 결과 Future를 돌려준다."""
+        if self.available is None:
+            # 이벤트 루프가 뜬 뒤에 만들어야 하므로 처음 쓸 때 만든다.
+            self.available = asyncio.Semaphore(0)
+            self.workers = [asyncio.ensure_future(self._worker()) for _ in range(self.concurrency)]
+
+        priority = self.priority(key, recency, requested, bulk)
+        job = self.jobs.get(key)
+        if job is None:
+            job = {"future": asyncio.get_running_loop().create_future(), "factory": factory,
+                   "priority": priority, "started": False}
+            self.jobs[key] = job
+        elif job["started"] or priority >= job["priority"]:
+            return job["future"]
+
+        # 우선순위가 올라간 작업은 새 항목으로 다시 넣고, 예전 항목은 꺼낼 때 건너뛴다.
+        job["priority"] = priority
+        heapq.heappush(self.heap, (priority, next(self.counter), key))
+        self.available.release()
+        return job["future"]
+
+    def record_failure(self, key):
+        self.failures[key] = self.failures.get(key, 0) + 1
+
+    async def _worker(self):
+        while True:
+            await self.available.acquire()
+            priority, _, key = heapq.heappop(self.heap)
+            job = self.jobs.get(key)
+            if job is None or job["started"] or job["priority"] != priority:
+                continue
+            job["started"] = True
+            self.running += 1
+            failures_before = self.failures.get(key, 0)
+            try:
+                job["future"].set_result(await job["factory"]())
+                self.completed += 1
+                # 성공했으면 다음 수집부터는 실패 이력으로 밀리지 않는다.
+                # (작업 안에서 record_failure로 실패를 남긴 경우, 예: 요약 오류 메시지는 그대로 둔다)
+                if self.failures.get(key, 0) == failures_before:
+                    self.failures.pop(key, None)
+            except Exception as e:
+                self.record_failure(key)
+                self.failed += 1
+                job["future"].set_exception(e)
+            finally:
+                self.running -= 1
+                self.jobs.pop(key, None)
+
+    def stats(self):
+        return {
+            "queued": sum(1 for job in self.jobs.values() if not job["started"]),
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "failed_keys": len(self.failures),
+        }
+
+
+crawl_queue = PriorityWorkQueue("crawl", CRAWL_QUEUE_CONCURRENCY)
+summary_queue = PriorityWorkQueue("summary", SUMMARY_QUEUE_CONCURRENCY)
+
+
+class ResponseSnapshot:
+    """
+    한 번 직렬화해 둔 응답 본문. 데이터가 바뀔 때까지 같은 bytes와 압축본을 재사용한다.
+    precompress=False(요청마다 새로 만드는 응답)면 압축본을 미리 만들지 않고,
+    클라이언트가 받을 인코딩 하나만 보낼 때 만든다.
+    """
+    __slots__ = ("body", "etag", "gzip", "brotli")
+
+    def __init__(self, data, precompress=True):
+        self.body = dump_json(data)
+        self.etag = '"' + hashlib.blake2b(self.body, digest_size=16).hexdigest() + '"'
+        self.gzip = None
+        self.brotli = None
+        if precompress:
+            self.encode("gzip")
+            if brotli:
+                self.encode("br")
+
+    def encode(self, encoding):
+        """encoding(None, "gzip", "br")에 맞는 본문. 압축본은 처음 필요할 때 만들어 둔다."""
+        if encoding == "br":
+            if self.brotli is None:
+                self.brotli = brotli.compress(self.body, quality=5)
+            return self.brotli
+        if encoding == "gzip":
+            if self.gzip is None:
+                self.gzip = gzip.compress(self.body, compresslevel=6)
+            return self.gzip
+        return self.body
+
+
+def dump_json(data):
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def get_response_snapshot(dataset, member_name, data, view="full", fields=()):
+    key = (dataset, member_name, view, fields)
+    snapshot = response_snapshots.get(key)
+    if snapshot is None:
+        snapshot = ResponseSnapshot([project_record(dataset, record, view, fields) for record in data])
+        response_snapshots[key] = snapshot
+    return snapshot
+
+
+def summary_view(dataset, record):
+    """목록 화면용: 크롤링한 본문(details)을 빼고 요약만 남긴다. 본문은 /api/bill_details로 따로 받는다."""
+    if dataset == "votes":
+        details = record.get("DETAILS") or {}
+        return {**record, "DETAILS": {"summary": details.get("summary", "")}}
+    return {key: value for key, value in record.items() if key != "DETAILS"}
+
+
+def project_record(dataset, record, view, fields):
+    if view == "summary":
+        record = summary_view(dataset, record)
+    if fields:
+        record = {key: record[key] for key in fields if key in record}
+    if isinstance(record, CompactRecord):
+        record = record.as_dict()
+    return record
+
+
+def parse_list_options(view, fields):
+    if view not in LIST_VIEWS:
+        raise HTTPException(status_code=400, detail=f"view must be one of {', '.join(LIST_VIEWS)}")
+    field_names = tuple(name.strip() for name in (fields or "").split(",") if name.strip())
+    return view, field_names
+
+
+def invalidate_snapshots(dataset, member_name=None):
+    for key in list(response_snapshots.keys()):
+        if key[0] == dataset and (member_name is None or key[1] == member_name):
+            response_snapshots.pop(key, None)
+
+
+def date_key(value):
+    # VOTE_DATE는 "20240702 1435" / "2024-07-02" 등 형식이 섞여 있어 YYYYMMDD 숫자만 비교한다.
+    return re.sub(r"\D", "", str(value or ""))[:8]
+
+
+def vote_sort_key(vote):
+    return (date_key(vote.get("VOTE_DATE")), vote.get("BILL_ID") or "")
+
+
+class CompactRecord:
+    """
+    캐시에 오래 들고 있는 목록 레코드. 필드를 __slots__로 고정해 dict보다 작게 두고,
+    레코드마다 반복되는 문자열(의원명, 위원회, 표결 결과, 의안명 등)은 sys.intern으로 한 객체를 공유한다.
+    get()/[]/keys()로 dict처럼 읽히고, 응답으로 내보낼 때만 as_dict()로 바꾼다.
+    """
+    __slots__ = ()
+    FIELDS = ()
+    INTERNED = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.FIELD_SET = frozenset(cls.FIELDS)
+
+    def __init__(self, record):
+        for field in self.FIELDS:
+            value = record.get(field)
+            if field in self.INTERNED and isinstance(value, str):
+                value = sys.intern(value)
+            setattr(self, field, value)
+
+    @classmethod
+    def of(cls, record):
+        return record if isinstance(record, cls) else cls(record)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.FIELD_SET else default
+
+    def __getitem__(self, key):
+        if key not in self.FIELD_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in self.FIELD_SET
+
+    def keys(self):
+        return self.FIELDS
+
+    def items(self):
+        return [(field, getattr(self, field)) for field in self.FIELDS]
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+
+class VoteRecord(CompactRecord):
+    """표결 하나. 표결 API row 중 화면과 DB에서 쓰는 필드만 남긴다 (vote_record_from_row와 같은 모양)."""
+    FIELDS = ("BILL_ID", "BILL_NO", "BILL_NAME", "BILL_URL", "VOTE_DATE",
+              "CURR_COMMITTEE", "HG_NM", "MONA_CD", "RESULT_VOTE_MOD", "DETAILS")
+    __slots__ = FIELDS
+    INTERNED = frozenset(FIELDS) - {"DETAILS"}
+
+    def __init__(self, record):
+        super().__init__(record)
+        self.DETAILS = share_vote_details(self.BILL_ID, self.DETAILS)
+
+
+class BillRecord(CompactRecord):
+    """발의 법안 하나 (representative_bill_record/collab_bill_record/bill_record_from_row와 같은 모양)."""
+    FIELDS = ("type", "bill_id", "bill_name", "propose_date", "committee", "proposer", "bill_link",
+              "DETAILS", "SUMMARY")
+    __slots__ = FIELDS
+    INTERNED = frozenset(FIELDS) - {"DETAILS", "SUMMARY"}
+
+
+def share_vote_details(bill_id, details):
+    # 같은 의안의 표결은 내용이 같은 DETAILS dict 하나를 가리키게 한다. 내용이 바뀌면 새 dict로 교체.
+    if bill_id is None or details is None:
+        return details
+    shared = shared_vote_details.get(bill_id)
+    if shared is not None and (shared is details or shared == details):
+        return shared
+    shared_vote_details[bill_id] = details
+    return details
+
+
+class MemberVotes:
+    """
+    의원 한 명의 표결 캐시. 최신순(의결일, BILL_ID 역순) 목록과 BILL_ID별/표결 결과별 인덱스를
+    한 번에 만들어 두므로, 결과 필터나 의안 조회가 전체 목록을 다시 정렬하거나 훑지 않는다.
+    list처럼 len()과 반복이 된다.
+    """
+    __slots__ = ("records", "by_bill", "by_result")
+
+    def __init__(self, records=()):
+        by_bill = {}
+        for record in records:
+            record = VoteRecord.of(record)
+            by_bill[record.BILL_ID] = record
+        self.by_bill = by_bill
+        self.records = sorted(by_bill.values(), key=vote_sort_key, reverse=True)
+        self.by_result = {}
+        for record in self.records:
+            self.by_result.setdefault(record.RESULT_VOTE_MOD, []).append(record)
+
+    @classmethod
+    def of(cls, records):
+        return records if isinstance(records, cls) else cls(records)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def ordered(self, results=()):
+        """최신순 목록. results를 주면 해당 표결 결과 인덱스만 최신순으로 합쳐서 돌려준다."""
+        if not results:
+            return self.records
+        lists = [self.by_result.get(result, []) for result in results]
+        if len(lists) == 1:
+            return lists[0]
+        return heapq.merge(*lists, key=vote_sort_key, reverse=True)
+
+
+EMPTY_MEMBER_VOTES = MemberVotes()
+
+
+def encode_cursor(vote):
+    raw = json.dumps(list(vote_sort_key(vote)), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor):
+    try:
+        date, bill_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return (str(date), str(bill_id))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def vote_filter(results, committee, date_from, date_to):
+    date_from, date_to = date_key(date_from), date_key(date_to)
+
+    def matches(vote):
+        if results and vote.get("RESULT_VOTE_MOD") not in results:
+            return False
+        if committee and vote.get("CURR_COMMITTEE") != committee:
+            return False
+        vote_date = date_key(vote.get("VOTE_DATE"))
+        if date_from and vote_date < date_from:
+            return False
+        if date_to and vote_date > date_to:
+            return False
+        return True
+    return matches
+
+
+def after_cursor(matches, cursor):
+    """최신순으로 cursor 다음에 오는 항목만 통과시키도록 필터를 감싼다."""
+    if not cursor:
+        return matches
+    after = decode_cursor(cursor)
+    return lambda vote: vote_sort_key(vote) < after and matches(vote)
+
+
+def vote_page(votes, matches, limit, cursor, results=()):
+    """
+    최신순 keyset 페이지네이션. cursor는 이전 페이지 마지막 항목의 (의결일, BILL_ID)라서
+    중간에 데이터가 바뀌어도 항목이 밀리거나 중복되지 않는다.
+    """
+    matches = after_cursor(matches, cursor)
+    candidates = (vote for vote in votes.ordered(results) if matches(vote))
+    page = list(itertools.islice(candidates, limit + 1))
+    next_cursor = encode_cursor(page[limit - 1]) if len(page) > limit else None
+    return page[:limit], next_cursor
+
+
+def wants_ndjson(request, format):
+    return format == "ndjson" or "application/x-ndjson" in request.headers.get("accept", "")
+
+
+def ndjson_response(records):
+    """
+    레코드를 한 줄에 하나씩(application/x-ndjson) 흘려보낸다. 전체 배열을 만들지 않으므로
+    클라이언트는 첫 줄부터 그릴 수 있고 서버 메모리도 늘지 않는다.
+    records는 일반 iterable이나 async iterable(DB 커서) 모두 된다.
+    """
+    async def body():
+        if hasattr(records, "__aiter__"):
+            async for record in records:
+                yield dump_json(record) + b"\n"
+        else:
+            for record in records:
+                yield dump_json(record) + b"\n"
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+
+async def stream_db_records(dataset, query, to_record, matches=None, view="full", fields=(), limit=None):
+    """DB 커서에서 읽는 대로 레코드로 바꿔 내보낸다."""
+    count = 0
+    async for row in database.iterate(query):
+        record = to_record(row)
+        if matches is not None and not matches(record):
+            continue
+        yield project_record(dataset, record, view, fields)
+        count += 1
+        if limit is not None and count >= limit:
+            break
+
+
+def etag_matches(if_none_match, etags):
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        # If-None-Match는 약한 비교: W/ 접두사는 무시한다.
+        if candidate == "*" or candidate.removeprefix("W/") in etags:
+            return True
+    return False
+
+
+def encoding_etag(etag, encoding):
+    # strong ETag는 content-coding마다 달라야 하므로 압축본에는 인코딩 이름을 붙인다. ("...-gzip")
+    if encoding is None:
+        return etag
+    return etag[:-1] + "-" + encoding + '"'
+
+
+
+def negotiate_encoding(request, snapshot):
+    if len(snapshot.body) < COMPRESS_MIN_BYTES:
+        # 작은 응답은 압축해도 거의 줄지 않으므로 그대로 보낸다.
+        return None
+    accept_encoding = request.headers.get("accept-encoding", "")
+    if brotli is not None and "br" in accept_encoding:
+        return "br"
+    if "gzip" in accept_encoding:
+        return "gzip"
+    return None
+
+
+def snapshot_response(request, snapshot):
+    """ETag가 같으면 304, 아니면 클라이언트가 받을 수 있는 압축본을 그대로 보낸다."""
+    encoding = negotiate_encoding(request, snapshot)
+    headers = {"ETag": encoding_etag(snapshot.etag, encoding), "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    # 다른 인코딩으로 받아 둔 ETag도 본문은 같으므로 304로 응답한다.
+    variants = {encoding_etag(snapshot.etag, variant) for variant in (None, "gzip", "br")}
+    if etag_matches(request.headers.get("if-none-match"), variants):
+        return Response(status_code=304, headers=headers)
+
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(content=snapshot.encode(encoding), media_type="application/json", headers=headers)
+
+
+def json_response(request, data):
+    """요청마다 새로 만드는 응답(필터/페이지, 중간 결과 등). 캐시하지 않으므로 필요한 압축본 하나만 만든다."""
+    return snapshot_response(request, ResponseSnapshot(data, precompress=False))
+
+
+def get_member_dataset(dataset, member_name):
+    return member_cache.get(member_name, {}).get(dataset)
+
+
+def set_member_dataset(dataset, member_name, data):
+    # 캐시에는 compact 레코드로 넣는다 (표결은 의원별 인덱스까지 같이 만든다).
+    if dataset == "votes":
+        data = MemberVotes.of(data)
+    else:
+        data = [BillRecord.of(record) for record in data]
+    entry = member_cache.get(member_name) or {}
+    entry[dataset] = data
+    member_cache[member_name] = entry
+    invalidate_snapshots(dataset, member_name)
+    publish_event("snapshot", {"dataset": dataset, "member": member_name})
+
+
+def set_partial_results(dataset, member_name, progress, records):
+    """
+    수집 중인 데이터셋의 중간 결과를 등록한다. progress는 {"done", "total"} dict(수집하면서 갱신),
+    records는 의원 이름을 받아 지금까지 모인 레코드 목록을 돌려주는 함수. member_name="*"면 전 의원 공용.
+    """
+    partial_results[(dataset, member_name)] = {"progress": progress, "records": records}
+
+
+def clear_partial_results(dataset, member_name):
+    partial_results.pop((dataset, member_name), None)
+
+
+def partial_payload(dataset, member_name, view, fields):
+    entry = partial_results.get((dataset, member_name)) or partial_results.get((dataset, "*"))
+    if entry is None:
+        return None
+    return {
+        "data": [project_record(dataset, record, view, fields) for record in entry["records"](member_name)],
+        "complete": False,
+        "progress": dict(entry["progress"]),
+    }
+
+
+def partial_or_loading(request, dataset, member_name, view, fields):
+    """아직 준비 전이면 수집 중인 중간 결과(complete: false)를, 그것도 없으면 loading을 돌려준다."""
+    payload = partial_payload(dataset, member_name, view, fields)
+    if payload is None:
+        return {"message": "loading"}
+    return json_response(request, payload)
+
+
+def publish_progress(dataset, progress):
+    # 의안마다 보내면 너무 많아서 PROGRESS_EVENT_EVERY건마다, 그리고 마지막에 보낸다.
+    if progress["done"] == progress["total"] or progress["done"] % PROGRESS_EVENT_EVERY == 0:
+        publish_event("progress", {"dataset": dataset, "member": "*", **progress})
+
+
+def dataset_status(dataset):
+    return {
+        "ready": dataset_ready(dataset),
+        "stale": data_stale[dataset],
+        "ingesting": [
+            {"member": member, **entry["progress"]}
+            for (name, member), entry in partial_results.items()
+            if name == dataset
+        ],
+    }
+
+
+def mark_dataset_ready(dataset):
+    global vote_data_loaded, bills_data_loaded
+    if dataset == "votes":
+        vote_data_loaded = True
+    else:
+        bills_data_loaded = True
+    publish_event("ready", {"dataset": dataset})
+
+
+def dataset_ready(dataset):
+    return vote_data_loaded if dataset == "votes" else bills_data_loaded
+
+
+def publish_event(event, data):
+    for queue in list(event_subscribers):
+        if queue.full():
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        queue.put_nowait((event, data))
+
+
+def refresh_progress():
+    return {key: refresh_state[key] for key in ("running", "stage", "done", "total", "last_success", "last_error")}
+
+
+def current_snapshot_etag(dataset, member_name):
+    """목록 API 기본 응답(view=summary)의 현재 ETag. 데이터가 없거나 아직 준비 전이면 None."""
+    if not dataset_ready(dataset):
+        return None
+    data = cached_votes(member_name) if dataset == "votes" else get_member_dataset(dataset, member_name)
+    if data is None:
+        return None
+    return get_response_snapshot(dataset, member_name, data, "summary", ()).etag
+
+
+def sse_message(event, data):
+    return b"event: " + event.encode("ascii") + b"\ndata: " + dump_json(data) + b"\n\n"
+
+
+def member_load_key(dataset, member_name):
+    # rollcall 모드의 투표는 전 의원 인덱스를 한 번에 만들므로 의원과 상관없이 하나의 작업을 공유한다.
+    shared = dataset == "votes" and VOTE_FETCH_MODE == "rollcall" and INGEST_IN_WEB
+    return ("load", dataset, "*" if shared else member_name)
+
+
+def member_load_factory(dataset, member_name, full=FULL_SYNC):
+    async def load():
+        # 서버 시작 직후 요청이면 백그라운드 스키마 준비가 끝날 때까지 기다린다.
+        await wait_for_schema()
+        if not INGEST_IN_WEB:
+            # 읽기 전용 웹 프로세스: 워커가 저장한 최신 데이터를 DB에서 다시 읽기만 한다.
+            return await reload_member_dataset(dataset, member_name)
+        if dataset == "votes":
+            return await force_fetch_vote_data(member_name, full=full)
+        return await force_fetch_bills_combined(member_name, full=full)
+    return load
+
+
+async def reload_member_dataset(dataset, member_name):
+    # 의원 목록에 있는 이름만 워커 수집 대상으로 등록한다. (아무 이름이나 매번 크롤링되지 않게)
+    if await resolve_mona_cd(member_name):
+        await track_member(member_name)
+    if dataset == "votes":
+        data = await load_member_votes_from_db(member_name)
+    else:
+        data = await load_member_bills_from_db(member_name)
+    if data:
+        set_member_dataset(dataset, member_name, data)
+        mark_dataset_ready(dataset)
+    return data
+
+
+async def load_member_dataset(dataset, member_name, full=FULL_SYNC):
+    return await single_flight(member_load_key(dataset, member_name), member_load_factory(dataset, member_name, full))
+
+
+def start_member_load(dataset, member_name):
+    """의원별 데이터를 백그라운드에서 불러온다. 이미 불러오는 중이면 그 작업을 돌려준다."""
+    key = member_load_key(dataset, member_name)
+    if key not in inflight:
+        print(f"[start_member_load] Loading {dataset} for {member_name}...")
+    return start_single_flight(key, member_load_factory(dataset, member_name))
+
+
+async def load_member_registry():
+    return await single_flight(("member_registry",), fetch_member_registry)
+
+
+async def fetch_member_registry():
+    """국회의원 인적사항 API로 의원명 -> monaCd 매핑을 만든다."""
+    global member_registry_loaded_at
+    rows = await fetch_open_api_all(member_info_url, "nwvrqwxyaytdsfvhu", {"Key": os.getenv("API_KEY")})
+    for row in rows:
+        if row.get("HG_NM") and row.get("MONA_CD"):
+            member_registry[row["HG_NM"]] = row["MONA_CD"]
+    member_registry_loaded_at = time.monotonic()
+    print(f"[load_member_registry] Loaded {len(member_registry)} members.")
+    return member_registry
+
+
+def member_registry_fresh():
+    return (member_registry_loaded_at is not None
+            and time.monotonic() - member_registry_loaded_at < MEMBER_REGISTRY_TTL_SECONDS)
+
+
+async def resolve_mona_cd(member_name):
+    if member_name in member_registry:
+        return member_registry[member_name]
+    if member_name in unknown_members:
+        return None
+    registry_loaded = member_registry_fresh()
+    if not registry_loaded:
+        try:
+            await load_member_registry()
+            registry_loaded = True
+        except Exception as e:
+            print(f"[resolve_mona_cd] 의원 목록 로드 오류: {e}")
+    if member_name not in member_registry:
+        # 표결 데이터에도 MONA_CD가 들어 있으므로 인덱스에서 한 번 더 찾아본다.
+        for vote in vote_index.get(member_name, EMPTY_MEMBER_VOTES):
+            if vote.get("MONA_CD"):
+                member_registry[member_name] = vote["MONA_CD"]
+                break
+    if member_name not in member_registry and registry_loaded:
+        # 목록을 제대로 받았는데도 없는 이름이면 잠시 기억해 둔다. (목록 API를 매번 다시 훑지 않게)
+        unknown_members[member_name] = True
+    return member_registry.get(member_name)
+
+
+async def require_member(member_name):
+    """의원 목록에 없는 이름이면 404. 없는 이름으로 수집/크롤링을 시작하거나 캐시 자리를 차지하지 않게 한다."""
+    if member_name == DEFAULT_MEMBER or member_name in member_cache:
+        return
+    if await resolve_mona_cd(member_name) is None:
+        raise HTTPException(status_code=404, detail="Unknown member")
+
+
+async def refresh_all(full=FULL_SYNC, extra_members=()):
+    # 동시에 여러 번 불려도 갱신 작업은 하나만 돌고 나머지는 그 결과를 기다린다.
+    return await single_flight(("refresh_all",), lambda: run_refresh(full, extra_members))
+
+
+async def run_refresh(full=FULL_SYNC, extra_members=()):
+    """
+    캐시에 있는 의원(+extra_members)들의 데이터를 새로 수집한다. 수집하는 동안에는 이전 스냅샷을
+    그대로 서비스하고, 데이터셋별로 수집이 끝나면 인덱스/캐시를 통째로 바꿔 끼운다.
+    읽기 전용 웹 프로세스(INGEST_IN_WEB=0)에서는 수집 대신 DB에서 다시 읽는다.
+    """
+    global last_refresh_date
+    members = list(member_cache.keys())
+    for member in [DEFAULT_MEMBER, *extra_members]:
+        if member not in members:
+            members.append(member)
+    if VOTE_FETCH_MODE == "rollcall" and INGEST_IN_WEB:
+        steps = [("votes", DEFAULT_MEMBER)]
+    else:
+        steps = [("votes", member) for member in members]
+    steps += [("bills", member) for member in members]
+
+    refresh_state.update(
+        running=True,
+        stage=None,
+        done=0,
+        total=len(steps),
+        started_at=datetime.now().isoformat(),
+        last_error=None,
+        failed_steps={},
+    )
+    print(f"[refresh_all] Refresh started: {len(steps)} steps")
+    try:
+        for dataset, member in steps:
+            step = f"{dataset}:{member}"
+            refresh_state["stage"] = step
+            publish_event("progress", refresh_progress())
+            try:
+                await load_member_dataset(dataset, member, full)
+            except Exception as e:
+                # 한 의원이 실패해도 나머지 의원은 계속 갱신한다. (실패한 의원은 이전 스냅샷 유지)
+                refresh_state["failed_steps"][step] = str(e)
+                refresh_state["last_error"] = f"{step}: {e}"
+                print(f"[refresh_all] Step {step} failed: {e}")
+            refresh_state["done"] += 1
+        if refresh_state["failed_steps"]:
+            print(f"[refresh_all] Refresh finished with {len(refresh_state['failed_steps'])} failed steps.")
+        else:
+            last_refresh_date = datetime.now().date()
+            refresh_state["last_success"] = datetime.now().isoformat()
+            print("[refresh_all] Refresh finished.")
+    finally:
+        refresh_state["running"] = False
+        refresh_state["stage"] = None
+        publish_event("progress", refresh_progress())
+
+
+async def refresh_scheduler():
+    """
+    매일 REFRESH_HOUR 시에 refresh_all을 실행한다.
+    읽기 전용 웹 프로세스에서는 SNAPSHOT_RELOAD_SECONDS마다 DB에서 최신 스냅샷을 다시 읽는다.
+    """
+    while True:
+        now = datetime.now()
+        if INGEST_IN_WEB:
+            next_run = next_refresh_time(now)
+        else:
+            next_run = now + timedelta(seconds=SNAPSHOT_RELOAD_SECONDS)
+        refresh_state["next_run"] = next_run.isoformat()
+        await asyncio.sleep((next_run - now).total_seconds())
+        await refresh_all()
 
 
 async def preload_vote_data():
     print("[preload_vote_data] vote 데이터 로드 중...")
     try:
-        votes = await force_fetch_vote_data("곽상언")
-        cache["votes"] = votes
+        await start_member_load("votes", DEFAULT_MEMBER)
+        # 법안 수집을 기다리지 않고 투표 데이터만 따로 준비 완료로 표시
+        data_stale["votes"] = False
+        mark_dataset_ready("votes")
         print("[preload_vote_data] vote 데이터 로드 완료.")
+        return True
     except Exception as e:
+        # 실패해도 warm start로 불러온 이전 스냅샷은 계속 서비스한다.
         print(f"[preload_vote_data] vote 데이터 로드 오류 발생: {e}")
+        refresh_state["last_error"] = str(e)
+        return False
 
 async def preload_bills_data():
-    global bills_data_loaded  # ✅ 글로벌 변수 사용
     print("[preload_bills_data] bill 데이터 로드 중...")
     try:
-        bills = await force_fetch_bills_combined("곽상언")
-        cache["bills"] = bills
-        bills_data_loaded = True  # ✅ 데이터 로드 완료 후 설정
+        await start_member_load("bills", DEFAULT_MEMBER)
+        data_stale["bills"] = False
+        mark_dataset_ready("bills")  # ✅ 데이터 로드 완료 후 설정
         print("[preload_bills_data] bill 데이터 로드 완료.")
+        return True
     except Exception as e:
         print(f"[preload_bills_data] bill 데이터 로드 오류 발생: {e}")
-        bills_data_loaded = False  # 오류 발생 시 False 설정
+        refresh_state["last_error"] = str(e)
+        return False
 
 async def preload_data():
-    global vote_data_loaded, bills_data_loaded
+    global last_refresh_date
 
     print("[preload_data] 데이터 로드 시작...")
-    await asyncio.gather(preload_vote_data(), preload_bills_data())
-    await asyncio.gather(preload_bills_data())
-    vote_data_loaded = True
-    bills_data_loaded = True
+    # 데이터셋마다 끝나는 대로 각자 준비 완료가 된다. (법안이 느린 투표 수집을 기다리지 않음)
+    loaded = await asyncio.gather(preload_vote_data(), preload_bills_data())
+    if not all(loaded):
+        print("[preload_data] 일부 데이터 로드 실패. 이전 스냅샷을 계속 서비스합니다.")
+        return
+    last_refresh_date = datetime.now().date()
+    refresh_state["last_success"] = datetime.now().isoformat()
     print("[preload_data] 데이터 로드 완료.")
 
 
-async def summarize_bill_details(content, max_retries=5):
+async def request_chat_completion(messages, estimated_tokens, max_retries=5, **kwargs):
+    """
+    공용 제한기를 거쳐 chat completion을 요청한다. 실패하면 None.
+    """
+    from openai import APIConnectionError, InternalServerError, RateLimitError
+
     for attempt in range(1, max_retries + 1):
+        # 모든 요약 호출은 공용 제한기 대기열을 거친다.
+        await summary_limiter.acquire(estimated_tokens)
+        transient = False
         try:
-            response = await client.chat.completions.create(
-                model="gpt-4o-mini",  
-                messages=[
-                    {"role": "system", "content": "법안 내용을 300자 이내로 요약. 핵심만 3-4줄로."},
-                    {"role": "user", "content": content}
-                ],
+            raw_response = await get_openai_client().chat.completions.with_raw_response.create(
+                model=SUMMARY_MODEL,
+                messages=messages,
                 temperature=0.7,
+                **kwargs,
             )
+            summary_limiter.on_response(raw_response.headers)
+            response = raw_response.parse()
             return response.choices[0].message.content
         except Exception as e:
-            print(f"[summarize_bill_details] Error in summarization (attempt={attempt}): {e}")
-            # 429 등 rate limit 초과 시 지연
-            if "rate_limit_exceeded" in str(e):
-                wait_time = 2 ** attempt
-                print(f"[summarize_bill_details] Rate limit exceeded. Retrying in {wait_time} seconds...")
-                await asyncio.sleep(wait_time)
+            print(f"[request_chat_completion] Error in summarization (attempt={attempt}): {e}")
+            # 429 등 rate limit 초과 시 제한기 속도를 줄이고 다시 대기열로
+            if isinstance(e, RateLimitError) or "rate_limit_exceeded" in str(e):
+                retry_after = rate_limit_retry_after(e)
+                summary_limiter.on_rate_limited(retry_after)
+                print(f"[request_chat_completion] Rate limit exceeded. Throttled to "
+                      f"{summary_limiter.stats()['rpm']} rpm, retrying after {retry_after} seconds...")
+            elif isinstance(e, (APIConnectionError, InternalServerError)):
+                # SDK 재시도를 껐으므로 일시적인 연결/서버 오류는 제한기 자리를 돌려준 뒤 잠깐 쉬고 다시 시도한다.
+                transient = True
             else:
                 break
+        finally:
+            summary_limiter.release()
+        if transient:
+            await asyncio.sleep(min(2 ** attempt, 30))
+    return None
+
+
+async def summarize_bill_details(content, max_retries=5):
+    summary = await request_chat_completion(
+        [
+            {"role": "system", "content": SUMMARY_PROMPT},
+            {"role": "user", "content": content}
+        ],
+        estimate_summary_tokens(content),
+        max_retries=max_retries,
+    )
+    if summary is None:
+        print("[summarize_bill_details] Failed to summarize after multiple attempts.")
+        return SUMMARY_ERROR_MESSAGE
+    return summary
+
+
+async def summarize_bills_batch(items):
+    """
+    items: [(bill_id, details), ...] 를 한 번의 요청으로 요약한다.
+    반환값: {bill_id: 요약}. 응답에서 빠졌거나 비어 있는 법안은 포함하지 않는다.
+    """
+    payload = json.dumps(
+        {"bills": [{"bill_id": bill_id, "content": details} for bill_id, details in items]},
+        ensure_ascii=False,
+    )
+    estimated_tokens = sum(estimate_summary_tokens(details) for _, details in items)
+    content = await request_chat_completion(
+        [
+            {"role": "system", "content": SUMMARY_BATCH_PROMPT},
+            {"role": "user", "content": payload}
+        ],
+        estimated_tokens,
+        response_format={"type": "json_object"},
+    )
+    if content is None:
+        return {}
+    try:
+        summaries = json.loads(content).get("summaries", {})
+    except (ValueError, AttributeError) as e:
+        print(f"[summarize_bills_batch] Invalid JSON response: {e}")
+        return {}
+    if not isinstance(summaries, dict):
+        return {}
+
+    results = {}
+    for bill_id, _ in items:
+        summary = summaries.get(bill_id)
+        if isinstance(summary, str) and summary.strip():
+            results[bill_id] = summary.strip()
+    print(f"[summarize_bills_batch] {len(results)}/{len(items)} bills summarized in one request.")
+    return results
+
+
+class SummaryBatcher:
+    """
+    동시에 들어오는 요약 요청을 토큰 예산(SUMMARY_BATCH_TOKEN_BUDGET)과 최대 건수까지 모아
+    summarize_bills_batch 한 번으로 보낸다. 배치 응답에 빠진 법안은 단건 요약으로 다시 요청한다.
+    """
+
+    def __init__(self, token_budget, max_items, max_wait):
+        self.token_budget = token_budget
+        self.max_items = max_items
+        self.max_wait = max_wait
+        self.pending = []
+        self.pending_tokens = 0
+        self.flush_handle = None
+
+    async def submit(self, bill_id, details):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        tokens = estimate_summary_tokens(details)
+        if self.pending and self.pending_tokens + tokens > self.token_budget:
+            self.flush()
+        self.pending.append((bill_id, details, future))
+        self.pending_tokens += tokens
+        if len(self.pending) >= self.max_items or self.pending_tokens >= self.token_budget:
+            self.flush()
+        elif self.flush_handle is None:
+            self.flush_handle = loop.call_later(self.max_wait, self.flush)
+        return await future
+
+    def flush(self):
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        batch, self.pending, self.pending_tokens = self.pending, [], 0
+        if batch:
+            asyncio.ensure_future(self.run(batch))
+
+    async def run(self, batch):
+        results = {}
+        if len(batch) > 1:
+            try:
+                results = await summarize_bills_batch([(bill_id, details) for bill_id, details, _ in batch])
+            except Exception as e:
+                print(f"[SummaryBatcher] Batch summarization failed: {e}")
+
+        missing = [(bill_id, details, future) for bill_id, details, future in batch if bill_id not in results]
+        if missing and len(batch) > 1:
+            print(f"[SummaryBatcher] Falling back to single summaries for {len(missing)} bills.")
+        fallbacks = await asyncio.gather(
+            *[summarize_bill_details(details) for _, details, _ in missing],
+            return_exceptions=True,
+        )
+        for (bill_id, _, _), summary in zip(missing, fallbacks):
+            results[bill_id] = summary if isinstance(summary, str) else SUMMARY_ERROR_MESSAGE
+
+        for bill_id, _, future in batch:
+            if not future.done():
+                future.set_result(results[bill_id])
+
+
+summary_batcher = SummaryBatcher(SUMMARY_BATCH_TOKEN_BUDGET, SUMMARY_BATCH_MAX_BILLS, SUMMARY_BATCH_MAX_WAIT)
+
+
+def summary_content_hash(details):
+    key = f"{SUMMARY_MODEL}\n{SUMMARY_PROMPT_VERSION}\n{SUMMARY_PROMPT}\n{details}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+async def load_stored_summary(content_hash):
+    row = await database.fetch_one(
+        bill_summaries_table.select().where(bill_summaries_table.c.content_hash == content_hash)
+    )
+    return row["summary"] if row else None
+
+
+async def store_summary(content_hash, summary):
+    statement = upsert_statement(bill_summaries_table, ["content_hash"], ["model", "prompt_version", "summary", "created_at"])
+    await database.execute(statement.values(
+        content_hash=content_hash,
+        model=SUMMARY_MODEL,
+        prompt_version=SUMMARY_PROMPT_VERSION,
+        summary=summary,
+        created_at=datetime.now().isoformat(),
+    ))
+
 
-    print("[summarize_bill_details] Failed to summarize after multiple attempts.")
-    return "요약 생성 중 오류가 발생했습니다."
+async def summarize_with_store(details, bill_id=None):
+    """
+    같은 본문(+프롬프트/모델 버전)에 대한 요약이 저장돼 있으면 그것을 쓰고,
+    없을 때만 LLM을 호출한 뒤 성공한 요약을 저장한다.
+    배치 모드에서는 다른 법안들과 묶어서 요청한다.
+    """
+    content_hash = summary_content_hash(details)
+    # 같은 본문이 여러 경로(투표/발의 수집)로 동시에 들어와도 요약은 한 번만 만든다.
+    return await single_flight(
+        ("summary", content_hash),
+        lambda: summarize_with_store_uncached(content_hash, details, bill_id),
+    )
+
+
+async def summarize_with_store_uncached(content_hash, details, bill_id):
+    try:
+        stored = await load_stored_summary(content_hash)
+    except Exception as e:
+        print(f"[summarize_with_store] 저장된 요약 조회 오류: {e}")
+        stored = None
+    if stored is not None:
+        return stored
+
+    if SUMMARY_BATCH_MODE:
+        summary = await summary_batcher.submit(bill_id or content_hash, details)
+    else:
+        summary = await summarize_bill_details(details)
+    if summary != SUMMARY_ERROR_MESSAGE:
+        try:
+            await store_summary(content_hash, summary)
+        except Exception as e:
+            print(f"[summarize_with_store] 요약 저장 오류: {e}")
+    return summary
 
 
-async def crawl_bill_details(bill_id):
+async def crawl_bill_details(bill_id, recency=None, requested=False, bulk=False):
+    """
+    의안 본문을 크롤링하고 요약한다. recency(의결일/제안일)가 최신일수록, requested(사용자 요청)면
+    우선순위 큐에서 먼저 처리되고, bulk(전체 표결 수집)면 발의 법안 수집 뒤로 밀린다.
+    같은 의안을 투표/발의 수집이 동시에 요청해도 큐에서 한 번만 처리한다.
+    """
     cache_key = f"bill_details_{bill_id}"
     if cache_key in cache:
         return cache[cache_key]
+    return await crawl_bill_details_uncached(bill_id, recency, requested, bulk)
+
+
+async def queue_bill_text(bill_id, recency=None, requested=False, bulk=False):
+    future = crawl_queue.submit(bill_id, lambda: fetch_bill_text(bill_id), recency, requested, bulk)
+    # shield: 기다리던 요청 하나가 취소돼도 공유 중인 작업은 계속 진행한다.
+    return await asyncio.shield(future)
+
+
+async def queue_bill_summary(bill_id, details, recency=None, requested=False, bulk=False):
+    async def summarize():
+        summary = await summarize_bill_text(bill_id, details)
+        if summary == SUMMARY_ERROR_MESSAGE:
+            summary_queue.record_failure(bill_id)
+        return summary
+    return await asyncio.shield(summary_queue.submit(bill_id, summarize, recency, requested, bulk))
 
+
+async def crawl_bill_details_uncached(bill_id, recency=None, requested=False, bulk=False):
+    cache_key = f"bill_details_{bill_id}"
     try:
-        url = f"https://likms.assembly.go.kr/bill/summaryPopup.do?billId={bill_id}"
-        response = requests.get(url)
-        response.raise_for_status()
+        details = await queue_bill_text(bill_id, recency, requested, bulk)
+        if details is None:
+            return {"details": "내용을 찾을 수 없습니다.", "summary": SUMMARY_UNAVAILABLE}
+
+        summary = await queue_bill_summary(bill_id, details, recency, requested, bulk)
+        result = {"details": details, "summary": summary}
+        cache[cache_key] = result
+        return result
+    except Exception as e:
+        print(f"[crawl_bill_details] Error while crawling BILL_ID {bill_id}: {e}")
+        return {"details": f"크롤링 중 오류 발생: {str(e)}", "summary": SUMMARY_UNAVAILABLE}
 
-        soup = BeautifulSoup(response.text, 'html.parser')
-        content_div = soup.find("div", class_="textType02 mt30")
 
-        if content_div:
-            raw_html = content_div.decode_contents()
-            text_with_newlines = raw_html.replace("<br/>", "\n").strip()
-            details = BeautifulSoup(text_with_newlines, 'html.parser').get_text()
+async def fetch_bill_text(bill_id):
+    """의안 요약 팝업에서 '제안이유 및 주요내용' 본문을 가져온다. 본문이 없으면 None."""
+    from bs4 import BeautifulSoup
 
-            if len(details.strip()) > 10:
-                try:
-                    summary = await summarize_bill_details(details)
-                except Exception as e:
-                    print(f"[crawl_bill_details] 요약 생성 중 오류: {e}")
-                    summary = "요약 생성 중 오류가 발생했습니다."
+    url = f"https://likms.assembly.go.kr/bill/summaryPopup.do?billId={bill_id}"
+    response = await http_get(url)
+    response.raise_for_status()
+
+    soup = BeautifulSoup(response.text, 'html.parser')
+    content_div = soup.find("div", class_="textType02 mt30")
+    if not content_div:
+        return None
+
+    raw_html = content_div.decode_contents()
+    text_with_newlines = raw_html.replace("<br/>", "\n").strip()
+    details = BeautifulSoup(text_with_newlines, 'html.parser').get_text()
+    return details.strip()
+
+
+async def summarize_bill_text(bill_id, details):
+    if len(details) > 10:
+        try:
+            return await summarize_with_store(details, bill_id)
+        except Exception as e:
+            print(f"[crawl_bill_details] 요약 생성 중 오류: {e}")
+            return SUMMARY_ERROR_MESSAGE
+    return "내용이 충분하지 않아 요약을 생성할 수 없습니다."
+
+
+async def fetch_existing_rows(table, key_columns, keys, for_update=False):
+    """
+    keys(튜플 리스트)에 해당하는 기존 row를 {key: row} 로 가져온다.
+    첫 번째 키 컬럼으로 IN 조회를 묶어서 보내고, 나머지 키는 파이썬에서 맞춘다.
+    for_update=True면 (PostgreSQL) 트랜잭션이 끝날 때까지 읽은 row를 잠근다.
+    """
+    existing = {}
+    lead_values = sorted({key[0] for key in keys})
+    for i in range(0, len(lead_values), UPSERT_BATCH_SIZE):
+        chunk = lead_values[i:i + UPSERT_BATCH_SIZE]
+        query = table.select().where(table.c[key_columns[0]].in_(chunk))
+        if for_update and database.url.dialect != "sqlite":
+            query = query.with_for_update()
+        rows = await database.fetch_all(query)
+        for row in rows:
+            existing[tuple(row[column] for column in key_columns)] = row
+    return existing
+
+
+def dialect_insert(table):
+    insert = postgresql.insert if database.url.dialect != "sqlite" else sqlite.insert
+    return insert(table)
+
+
+def upsert_statement(table, key_columns, update_columns, rows=None):
+    """rows를 넘기면 여러 row를 한 번에 보내는 INSERT ... VALUES (...), (...) ON CONFLICT 문을 만든다."""
+    statement = dialect_insert(table)
+    if rows is not None:
+        statement = statement.values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=key_columns,
+        set_={column: statement.excluded[column] for column in update_columns},
+    )
+
+
+def increment_statement(table, key_columns, column, rows):
+    """없으면 INSERT, 있으면 column = column + excluded.column. 읽지 않고 DB에서 바로 더한다."""
+    statement = dialect_insert(table).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=key_columns,
+        set_={column: table.c[column] + statement.excluded[column]},
+    )
+
+
+def statement_chunks(records):
+    """multi-row 문 하나에 넣을 row 묶음. 바인드 파라미터 수 제한(SQLite 999, PostgreSQL 32767)을 넘지 않게 나눈다."""
+    if not records:
+        return
+    max_params = 999 if database.url.dialect == "sqlite" else 32767
+    size = max(1, min(UPSERT_BATCH_SIZE, max_params // len(records[0])))
+    for i in range(0, len(records), size):
+        yield records[i:i + size]
+
+
+async def bulk_upsert(table, key_columns, records, changes=None, on_changes=None):
+    """
+    records(컬럼명 -> 값 dict 리스트)를 key_columns 기준으로 한 트랜잭션에서 upsert한다.
+    기존 row를 한 번에 조회해 값이 바뀐 row만 INSERT ... ON CONFLICT DO UPDATE로 보낸다.
+    changes 리스트를 넘기면 바뀐 row마다 (기존 row 또는 None, 새 record)를 채워 준다.
+    on_changes(changes)를 넘기면 같은 트랜잭션 안에서 호출한다. (파생 테이블을 함께 갱신할 때)
+    반환값: {"inserted": n, "updated": n, "unchanged": n}
+    """
+    stats = {"inserted": 0, "updated": 0, "unchanged": 0}
+    if not records:
+        return stats
+
+    # 같은 키가 여러 번 들어오면 마지막 값을 사용
+    by_key = {}
+    for record in records:
+        by_key[tuple(record[column] for column in key_columns)] = record
+
+    value_columns = [column for column in records[0] if column not in key_columns]
+    row_changes = []
+    async with database.transaction():
+        # on_changes가 기존 값을 기준으로 파생 테이블을 고치므로, 그때는 읽은 row를 잠가 동시 writer와 겹치지 않게 한다.
+        existing = await fetch_existing_rows(table, key_columns, list(by_key), for_update=on_changes is not None)
+
+        changed = []
+        for key, record in by_key.items():
+            old = existing.get(key)
+            if old is None:
+                stats["inserted"] += 1
+                changed.append(record)
+            elif any(old[column] != record[column] for column in value_columns):
+                stats["updated"] += 1
+                changed.append(record)
             else:
-                summary = "내용이 충분하지 않아 요약을 생성할 수 없습니다."
+                stats["unchanged"] += 1
+                continue
+            row_changes.append((old, record))
+
+        # execute_many는 asyncpg에서 row마다 한 번씩 왕복하므로, 묶음마다 multi-row 문 하나로 보낸다.
+        for chunk in statement_chunks(changed):
+            await database.execute(upsert_statement(table, key_columns, value_columns, rows=chunk))
+        if on_changes is not None and row_changes:
+            await on_changes(row_changes)
+
+    if changes is not None:
+        changes.extend(row_changes)
+    return stats
+
+
+async def load_watermark(source):
+    row = await database.fetch_one(
+        sync_state_table.select().where(sync_state_table.c.source == source)
+    )
+    return row["watermark"] if row else None
+
+
+async def save_watermark(source, watermark):
+    if not watermark:
+        return
+    statement = upsert_statement(sync_state_table, ["source"], ["watermark", "updated_at"])
+    await database.execute(statement.values(
+        source=source,
+        watermark=watermark,
+        updated_at=datetime.now().isoformat(),
+    ))
+    print(f"[save_watermark] {source} -> {watermark}")
+
+
+def parse_vote_details(details_str):
+    """save_votes_to_db가 저장한 "Details: ...\\nSummary: ..." 문자열을 DETAILS dict로 되돌린다."""
+    details_str = details_str or ""
+    details, summary = details_str, ""
+    if "\nSummary: " in details_str:
+        details, _, summary = details_str.rpartition("\nSummary: ")
+    if details.startswith("Details: "):
+        details = details[len("Details: "):]
+    return {"details": details, "summary": summary}
+
+
+def vote_record_from_row(row, details=None):
+    """
+    votes(+bill_text) row를 표결 API row와 같은 모양의 dict로 바꾼다.
+    details를 넘기면 의안별로 공유하는 DETAILS dict를 그대로 쓴다.
+    """
+    if details is None:
+        details = {"details": row["details"] or "", "summary": row["summary"] or ""}
+    return {
+        "BILL_ID": row["bill_id"],
+        "BILL_NO": row["bill_no"],
+        "BILL_NAME": row["bill_name"],
+        "BILL_URL": row["bill_url"],
+        "VOTE_DATE": row["vote_date"],
+        "CURR_COMMITTEE": row["committee"],
+        "HG_NM": row["m_name"],
+        "MONA_CD": row["mona_cd"],
+        "RESULT_VOTE_MOD": row["vote_result"],
+        "DETAILS": details,
+    }
 
-            result = {"details": details.strip(), "summary": summary}
-            cache[cache_key] = result
-            return result
-        else:
-            return {"details": "내용을 찾을 수 없습니다.", "summary": "요약 불가"}
+
+async def known_vote_bill_ids():
+    rows = await database.fetch_all(select(votes_table.c.bill_id).distinct())
+    return {row["bill_id"] for row in rows}
+
+
+def vote_columns():
+    # votes.details는 예전 데이터라서 읽지 않는다.
+    return [column for column in votes_table.c if column.name != "details"]
+
+
+async def load_bill_texts():
+    """bill_text 전체를 {bill_id: {"details", "summary"}}로. 같은 의안의 표결들이 이 dict 하나를 공유한다."""
+    rows = await database.fetch_all(bill_text_table.select())
+    return {row["bill_id"]: {"details": row["details"] or "", "summary": row["summary"] or ""} for row in rows}
+
+
+async def load_vote_index_from_db():
+    """DB에 저장된 전체 표결로 투표 인덱스를 다시 만든다. (의안 본문은 bill_text에서 의안당 한 번만)"""
+    rows = await database.fetch_all(select(*vote_columns()).where(vote_has_metadata()))
+    texts = await load_bill_texts()
+    empty = {"details": "", "summary": ""}
+    new_index = {}
+    for row in rows:
+        bill_id = row["bill_id"]
+        new_index.setdefault(row["m_name"], {})[bill_id] = vote_record_from_row(row, texts.get(bill_id, empty))
+    swap_vote_index(new_index)
+    print(f"[load_vote_index_from_db] Loaded {len(rows)} votes for {len(vote_index)} members.")
+    return vote_index
+
+
+def vote_has_metadata():
+    # 예전 코드가 남긴 row(결과 'unknown', 의결일/의안명 없음)는 화면에 보여줄 수 없으므로 읽지 않는다.
+    return (votes_table.c.vote_result != "unknown") & votes_table.c.vote_date.isnot(None)
+
+
+def member_votes_query(member_name):
+    return (
+        select(*vote_columns(), bill_text_table.c.details, bill_text_table.c.summary)
+        .select_from(votes_table.outerjoin(bill_text_table, votes_table.c.bill_id == bill_text_table.c.bill_id))
+        .where(votes_table.c.m_name == member_name)
+        .where(vote_has_metadata())
+        .order_by(votes_table.c.vote_date.desc(), votes_table.c.bill_id.desc())
+    )
+
+
+async def load_member_votes_from_db(member_name):
+    rows = await database.fetch_all(member_votes_query(member_name))
+    return [vote_record_from_row(row) for row in rows]
+
+
+def member_bills_query(member_name):
+    bill_columns = [column for column in bills_table.c if column.name not in ("details", "summary")]
+    return (
+        select(
+            *bill_columns,
+            member_bills_table.c.bill_type,
+            # worker.py --migrate 전이면 bill_text가 비어 있으므로 예전 bills 컬럼을 대신 읽는다.
+            func.coalesce(bill_text_table.c.details, bills_table.c.details).label("details"),
+            func.coalesce(bill_text_table.c.summary, bills_table.c.summary).label("summary"),
+        )
+        .select_from(
+            bills_table
+            .join(member_bills_table, bills_table.c.bill_id == member_bills_table.c.bill_id)
+            .outerjoin(bill_text_table, bills_table.c.bill_id == bill_text_table.c.bill_id)
+        )
+        .where(member_bills_table.c.m_name == member_name)
+        .order_by(member_bills_table.c.bill_type.desc(), member_bills_table.c.id)
+    )
+
+
+def bill_record_from_row(row):
+    return {
+        "type": row["bill_type"],
+        "bill_id": row["bill_id"],
+        "bill_name": row["bill_name"],
+        "propose_date": row["propose_date"],
+        "committee": row["committee"],
+        "proposer": row["proposer"],
+        "bill_link": row["bill_link"],
+        "DETAILS": row["details"],
+        "SUMMARY": row["summary"],
+    }
+
+
+async def load_member_bills_from_db(member_name):
+    rows = await database.fetch_all(member_bills_query(member_name))
+    return [bill_record_from_row(row) for row in rows]
+
+
+async def backfill_member_bills():
+    """
+    member_bills가 비어 있으면(처음 배포) 예전 bills row를 기본 의원의 발의 법안으로 채운다.
+    예전 코드는 기본 의원 한 명의 법안만 bills에 저장했으므로, 그래야 warm start가 바로 법안을 보여줄 수 있다.
+    """
+    if await database.fetch_one(select(member_bills_table.c.id).limit(1)):
+        return
+    rows = await database.fetch_all(select(bills_table.c.bill_id, bills_table.c.proposer))
+    records = [
+        {
+            "m_name": DEFAULT_MEMBER,
+            "bill_id": row["bill_id"],
+            # 대표발의는 "곽상언의원 등 12인"처럼 제안자가 본인 이름으로 시작한다.
+            "bill_type": "대표발의" if (row["proposer"] or "").startswith(DEFAULT_MEMBER) else "공동발의",
+        }
+        for row in rows
+        if row["bill_id"]
+    ]
+    stats = await bulk_upsert(member_bills_table, ["m_name", "bill_id"], records)
+    print(f"[backfill_member_bills] {DEFAULT_MEMBER}: {stats}")
+
+
+async def save_member_bills_to_db(member_name, bills):
+    records = [
+        {"m_name": member_name, "bill_id": bill["bill_id"], "bill_type": bill["type"]}
+        for bill in bills
+        if bill.get("bill_id")
+    ]
+    return await bulk_upsert(member_bills_table, ["m_name", "bill_id"], records)
+
+
+async def load_bill_details(bill_id):
+    """메모리 캐시 -> bill_text 테이블 -> 예전 bills 컬럼 순으로 의안 본문과 요약을 찾는다. 없으면 None."""
+    cached = cache.get(f"bill_details_{bill_id}")
+    if cached:
+        return cached
+    row = await database.fetch_one(
+        select(bill_text_table.c.details, bill_text_table.c.summary).where(bill_text_table.c.bill_id == bill_id)
+    )
+    if row and row["details"]:
+        return {"details": row["details"], "summary": row["summary"]}
+    # worker.py --migrate 전이면 본문이 아직 예전 bills 컬럼에 있다. (member_bills_query와 같은 fallback)
+    row = await database.fetch_one(
+        select(bills_table.c.details, bills_table.c.summary).where(bills_table.c.bill_id == bill_id)
+    )
+    if row and row["details"]:
+        return {"details": row["details"], "summary": row["summary"]}
+    return None
+
+
+async def track_member(member_name):
+    statement = upsert_statement(tracked_members_table, ["m_name"], ["requested_at"])
+    await database.execute(statement.values(m_name=member_name, requested_at=datetime.now().isoformat()))
+
+
+async def load_tracked_members():
+    rows = await database.fetch_all(select(tracked_members_table.c.m_name))
+    return [row["m_name"] for row in rows]
+
+
+async def warm_start():
+    """
+    마지막으로 저장된 스냅샷을 DB에서 읽어 기본 의원 캐시를 채우고, 준비됐지만 오래된(stale) 상태로 표시한다.
+    라이브 수집은 그 뒤 백그라운드에서 돌고, 끝나면 캐시를 바꿔 끼운다.
+    """
+    started = time.monotonic()
+    try:
+        votes = await load_member_votes_from_db(DEFAULT_MEMBER)
+        if votes:
+            data_stale["votes"] = INGEST_IN_WEB
+            set_member_dataset("votes", DEFAULT_MEMBER, votes)
+            mark_dataset_ready("votes")
+
+        bills = await load_member_bills_from_db(DEFAULT_MEMBER)
+        if bills:
+            data_stale["bills"] = INGEST_IN_WEB
+            set_member_dataset("bills", DEFAULT_MEMBER, bills)
+            mark_dataset_ready("bills")
+        print(f"[warm_start] Loaded {len(votes)} votes, {len(bills)} bills from DB "
+              f"in {time.monotonic() - started:.3f}s")
     except Exception as e:
-        print(f"[crawl_bill_details] Error while crawling BILL_ID {bill_id}: {e}")
-        return {"details": f"크롤링 중 오류 발생: {str(e)}", "summary": "요약 불가"}
-    
+        print(f"[warm_start] DB 스냅샷 로드 오류: {e}")
+
 
 async def save_votes_to_db(votes):
     """
-    votes는 [{"BILL_ID": "...", "RESULT": "...", "HG_NM": "...", "DETAILS": {...}}, ...] 형태라고 가정
+    votes는 [{"BILL_ID": "...", "RESULT_VOTE_MOD": "...", "HG_NM": "...", "DETAILS": {...}}, ...] 형태라고 가정
     """
+    records = []
+    texts = {}
     for v in votes:
         bill_id = v.get("BILL_ID")
-        vote_result = v.get("RESULT") or "unknown"
-        member_name = v.get("HG_NM") or "unknown"
-
-        # DETAILS라는 dict 안에 details, summary 등이 있다고 가정
-        details_str = ""
-        if "DETAILS" in v and isinstance(v["DETAILS"], dict):
-            # 문자열로 바꿔서 저장
-            details_str = (
-                f"Details: {v['DETAILS'].get('details', '')}\n"
-                f"Summary: {v['DETAILS'].get('summary', '')}"
-            )
+        if not bill_id:
+            continue
 
-        # 1) 기존 레코드가 있는지 확인
-        existing_vote = await database.fetch_one(
-            votes_table.select().where(
-                (votes_table.c.bill_id == bill_id) &
-                (votes_table.c.m_name == member_name)
-            )
-        )
+        # DETAILS라는 dict 안에 details, summary 등이 있다고 가정. 본문은 의안당 한 번만 bill_text에 저장한다.
+        if isinstance(v.get("DETAILS"), dict):
+            texts[bill_id] = (v["DETAILS"].get("details"), v["DETAILS"].get("summary"))
+
+        records.append({
+            "bill_id": bill_id,
+            "m_name": v.get("HG_NM") or "unknown",
+            "vote_result": v.get("RESULT_VOTE_MOD") or v.get("RESULT") or "unknown",
+            "bill_no": v.get("BILL_NO"),
+            "bill_name": v.get("BILL_NAME"),
+            "vote_date": v.get("VOTE_DATE"),
+            "committee": v.get("CURR_COMMITTEE"),
+            "bill_url": v.get("BILL_URL"),
+            "mona_cd": v.get("MONA_CD"),
+        })
 
-        if existing_vote:
-            # 2) 있다면 Update
-            update_query = (
-                votes_table
-                .update()
-                .where(
-                    (votes_table.c.bill_id == bill_id) &
-                    (votes_table.c.m_name == member_name)
-                )
-                .values(
-                    vote_result=vote_result,
-                    details=details_str
-                )
+    await save_bill_texts(texts)
+    # vote_stats는 votes와 같은 트랜잭션에서 증감한다. (중간에 죽어도 둘이 어긋나지 않게)
+    stats = await bulk_upsert(votes_table, ["bill_id", "m_name"], records, on_changes=apply_vote_stat_changes)
+    print(f"[save_votes_to_db] Finished processing {len(votes)} votes: {stats}")
+    return stats
+
+
+VOTE_STATS_KEY = ["m_name", "vote_result", "committee", "month"]
+
+
+def vote_row_has_metadata(row):
+    # vote_has_metadata()와 같은 조건. 목록에서 숨기는 예전 row는 통계에도 넣지 않는다.
+    return row["vote_result"] not in (None, "unknown") and row["vote_date"] is not None
+
+
+def vote_stat_bucket(row):
+    # NULL은 유니크 인덱스/ON CONFLICT에서 서로 다른 값으로 취급되므로 빈 문자열로 맞춘다.
+    return (row["m_name"], row["vote_result"] or "unknown", row["committee"] or "", date_key(row["vote_date"])[:6])
+
+
+async def apply_vote_stat_changes(changes):
+    """
+    바뀐 표결 row만큼 vote_stats 카운트를 증감한다. (기존 버킷 -1, 새 버킷 +1)
+    현재 값을 읽지 않고 count = count + delta로 DB에서 더하므로 동시에 써도 증감이 사라지지 않는다.
+    """
+    deltas = {}
+    for old, new in changes:
+        if old is not None and vote_row_has_metadata(old):
+            bucket = vote_stat_bucket(old)
+            deltas[bucket] = deltas.get(bucket, 0) - 1
+        if vote_row_has_metadata(new):
+            bucket = vote_stat_bucket(new)
+            deltas[bucket] = deltas.get(bucket, 0) + 1
+    deltas = {bucket: delta for bucket, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    records = [{**dict(zip(VOTE_STATS_KEY, bucket)), "count": delta} for bucket, delta in sorted(deltas.items())]
+    for chunk in statement_chunks(records):
+        await database.execute(increment_statement(vote_stats_table, VOTE_STATS_KEY, "count", chunk))
+
+
+async def rebuild_vote_stats(force=False):
+    """
+    votes 전체로 vote_stats를 다시 센다. 평소에는 비어 있을 때(처음 배포)만, force=True(worker.py --migrate)면 항상.
+    절대값을 쓰므로 한 트랜잭션 안에서 votes 쓰기를 막아 두고(PostgreSQL 테이블 잠금) 동시에 들어온 증감을 덮어쓰지 않는다.
+    수집하는 프로세스(워커, 또는 INGEST_IN_WEB=1인 웹)에서만 부른다.
+    """
+    async with database.transaction():
+        if database.url.dialect != "sqlite":
+            await database.execute(query="LOCK TABLE votes IN SHARE MODE")
+        if not force and await database.fetch_one(select(vote_stats_table.c.id).limit(1)):
+            return
+        columns = [votes_table.c.m_name, votes_table.c.vote_result, votes_table.c.committee, votes_table.c.vote_date]
+        counts = {}
+        async for row in database.iterate(select(*columns).where(vote_has_metadata())):
+            bucket = vote_stat_bucket(row)
+            counts[bucket] = counts.get(bucket, 0) + 1
+        records = [{**dict(zip(VOTE_STATS_KEY, bucket)), "count": count} for bucket, count in counts.items()]
+        await database.execute(vote_stats_table.delete())
+        for chunk in statement_chunks(records):
+            await database.execute(upsert_statement(vote_stats_table, VOTE_STATS_KEY, ["count"], rows=chunk))
+    print(f"[rebuild_vote_stats] Built {len(records)} buckets from votes.")
+
+
+async def load_vote_stats(member_name):
+    rows = await database.fetch_all(
+        vote_stats_table.select().where(vote_stats_table.c.m_name == member_name)
+    )
+    by_result, by_committee, by_month = {}, {}, {}
+    for row in rows:
+        result, count = row["vote_result"], row["count"]
+        # "unknown"은 예전 row가 남긴 버킷이다. (worker.py --migrate 전까지 남아 있을 수 있다)
+        if count <= 0 or result == "unknown":
+            continue
+        by_result[result] = by_result.get(result, 0) + count
+        committee = by_committee.setdefault(row["committee"] or "미분류", {})
+        committee[result] = committee.get(result, 0) + count
+        month = by_month.setdefault(row["month"] or "unknown", {})
+        month[result] = month.get(result, 0) + count
+    return {
+        "member_name": member_name,
+        "total": sum(by_result.values()),
+        "by_result": by_result,
+        "by_committee": by_committee,
+        "by_month": dict(sorted(by_month.items())),
+    }
+
+async def save_bill_texts(texts):
+    """
+    texts: {bill_id: (details, summary)}. 본문이 있는 의안만 bill_text에 upsert한다.
+    크롤링 실패로 채운 임시 값(SUMMARY_UNAVAILABLE)은 저장하지 않고, 요약만 실패한 결과로
+    이미 저장된 정상 요약을 덮어쓰지 않는다. (모든 의원의 표결이 이 row 하나를 공유한다)
+    """
+    records = [
+        {"bill_id": bill_id, "details": details, "summary": summary}
+        for bill_id, (details, summary) in texts.items()
+        if details and summary != SUMMARY_UNAVAILABLE
+    ]
+    failed = [(record["bill_id"],) for record in records if record["summary"] == SUMMARY_ERROR_MESSAGE]
+    if failed:
+        existing = await fetch_existing_rows(bill_text_table, ["bill_id"], failed)
+        records = [
+            record for record in records
+            if record["summary"] != SUMMARY_ERROR_MESSAGE
+            or existing.get((record["bill_id"],)) is None
+            or existing[(record["bill_id"],)]["summary"] in (None, "", SUMMARY_ERROR_MESSAGE)
+        ]
+    return await bulk_upsert(bill_text_table, ["bill_id"], records)
+
+
+async def backfill_bill_text():
+    """
+    예전 bills.details / votes.details에 들어 있던 본문을 bill_text로 옮기고, 옮긴 의안의 예전 컬럼만 비운다.
+    되돌릴 수 없는 작업이라 서버 시작 때 돌리지 않고 `python worker.py --migrate`로 한 번 실행한다.
+    이미 bill_text에 있는 의안은 덮어쓰지 않으므로 여러 번 실행해도 된다.
+    """
+    texts = {}
+    async for row in database.iterate(
+        select(bills_table.c.bill_id, bills_table.c.details, bills_table.c.summary)
+        .where(bills_table.c.details.isnot(None))
+    ):
+        texts[row["bill_id"]] = (row["details"], row["summary"])
+    async for row in database.iterate(
+        select(votes_table.c.bill_id, votes_table.c.details).where(votes_table.c.details.isnot(None))
+    ):
+        if row["bill_id"] not in texts:
+            parsed = parse_vote_details(row["details"])
+            texts[row["bill_id"]] = (parsed["details"], parsed["summary"])
+
+    existing = await fetch_existing_rows(bill_text_table, ["bill_id"], [(bill_id,) for bill_id in texts])
+    stats = await save_bill_texts({
+        bill_id: text for bill_id, text in texts.items() if (bill_id,) not in existing
+    })
+    # 본문이 비어 있어 bill_text에 저장하지 않은 의안은 예전 컬럼도 그대로 둔다.
+    moved = sorted(bill_id for bill_id, (details, _) in texts.items() if (bill_id,) in existing or details)
+    async with database.transaction():
+        for i in range(0, len(moved), UPSERT_BATCH_SIZE):
+            chunk = moved[i:i + UPSERT_BATCH_SIZE]
+            await database.execute(
+                votes_table.update().where(votes_table.c.bill_id.in_(chunk)).values(details=None)
             )
-            await database.execute(update_query)
-            print(f"[save_votes_to_db] Updated existing vote (bill_id={bill_id}, m_name={member_name})")
-        else:
-            # 3) 없다면 Insert
-            insert_query = votes_table.insert().values(
-                bill_id=bill_id,
-                vote_result=vote_result,
-                m_name=member_name,
-                details=details_str
+            await database.execute(
+                bills_table.update().where(bills_table.c.bill_id.in_(chunk)).values(details=None, summary=None)
             )
-            await database.execute(insert_query)
-            print(f"[save_votes_to_db] Inserted new vote (bill_id={bill_id}, m_name={member_name})")
+    print(f"[backfill_bill_text] Moved {len(moved)} of {len(texts)} bill texts: {stats}")
 
-    print(f"[save_votes_to_db] Finished processing {len(votes)} votes.")
 
 async def save_bills_to_db(bills):
+    records = []
+    texts = {}
     for b in bills:
         bill_id = b.get("bill_id")
         if not bill_id:
             continue
+        texts[bill_id] = (b.get("DETAILS"), b.get("SUMMARY"))
+
+        records.append({
+            "bill_id": bill_id,
+            "bill_name": b.get("bill_name"),
+            "propose_date": b.get("propose_date"),
+            "committee": b.get("committee"),
+            "proposer": b.get("proposer"),
+            "bill_link": b.get("bill_link"),
+            "proc_dt": b.get("proc_dt"),
+        })
 
-        # 1) bill_id가 이미 있는지 검사
-        existing_bill = await database.fetch_one(
-            bills_table.select().where(bills_table.c.bill_id == bill_id)
-        )
+    await save_bill_texts(texts)
+    stats = await bulk_upsert(bills_table, ["bill_id"], records)
+    print(f"[save_bills_to_db] Finished processing {len(bills)} bills: {stats}")
+    return stats
 
-        if existing_bill:
-            # 2) 업데이트
-            update_query = (
-                bills_table
-                .update()
-                .where(bills_table.c.bill_id == bill_id)
-                .values(
-                    bill_name=b.get("bill_name"),
-                    propose_date=b.get("propose_date"),
-                    committee=b.get("committee"),
-                    proposer=b.get("proposer"),
-                    bill_link=b.get("bill_link"),
-                    details=b.get("DETAILS"),
-                    summary=b.get("SUMMARY"),
-                    proc_dt=b.get("proc_dt"),
-                )
-            )
-            await database.execute(update_query)
-            print(f"[save_bills_to_db] Updated existing bill_id={bill_id}")
-        else:
-            # 3) 없다면 Insert
-            insert_query = bills_table.insert().values(
-                bill_id=b.get("bill_id"),
-                bill_name=b.get("bill_name"),
-                propose_date=b.get("propose_date"),
-                committee=b.get("committee"),
-                proposer=b.get("proposer"),
-                bill_link=b.get("bill_link"),
-                proc_dt=b.get("proc_dt"),
-                details=b.get("DETAILS"),
-                summary=b.get("SUMMARY"),
-            )
-            await database.execute(insert_query)
-            print(f"[save_bills_to_db] Inserted new bill_id={bill_id}")
 
-    print(f"[save_bills_to_db] Finished processing {len(bills)} bills.")
+async def fetch_collab_bills_with_selenium(mona_cd):
+    # 세션 쿠키는 이 수집에서만 쓴다. 공용 cookie jar에 두면 동시에 도는 다른 의원 수집의 GET이
+    # 세션을 바꿔서, 이쪽 CSRF 토큰과 세션이 어긋나 POST가 실패한다.
+    session_cookies = httpx.Cookies()
 
+    async def get_csrf_token():
+        from bs4 import BeautifulSoup
 
-async def fetch_collab_bills_with_selenium():
-    session = requests.Session()
-    
-    def get_csrf_token():
-        url = "https://www.assembly.go.kr/portal/assm/assmPrpl/prplMst.do?monaCd=FIE6569O&st=22&viewType=CONTBODY&tabId=collabill"
+        url = f"https://www.assembly.go.kr/portal/assm/assmPrpl/prplMst.do?monaCd={mona_cd}&st=22&viewType=CONTBODY&tabId=collabill"
         
         headers = {
             "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
@@ -326,10 +2355,11 @@ async def fetch_collab_bills_with_selenium():
             "Upgrade-Insecure-Requests": "1"
         }
         
-        response = session.get(url, headers=headers)
+        response = await http_get(url, headers=headers, cookies=session_cookies)
         
         if response.status_code == 200:
-            print("✅ 받은 쿠키:", session.cookies.get_dict())
+            session_cookies.update(response.cookies)
+            print("✅ 받은 쿠키:", dict(response.cookies))
             soup = BeautifulSoup(response.text, "html.parser")
             csrf_token = soup.find("meta", {"name": "_csrf"})["content"]
             print(f"✅ CSRF 토큰: {csrf_token}")
@@ -337,9 +2367,9 @@ async def fetch_collab_bills_with_selenium():
         else:
             raise Exception(f"❌ GET 요청 실패! 상태 코드: {response.status_code}")
 
-    def fetch_data():
+    async def fetch_data():
         url = "https://www.assembly.go.kr/portal/assm/assmPrpl/findCollaPrpsBill.json"
-        csrf_token = get_csrf_token()
+        csrf_token = await get_csrf_token()
         
         headers = {
             "Accept": "application/json, text/javascript, */*; q=0.01",
@@ -356,7 +2386,7 @@ async def fetch_collab_bills_with_selenium():
             "pageIndex": "1",
             "rowSize": "10",
             "represent": "법률안",
-            "monaCd": "FIE6569O",
+            "monaCd": mona_cd,
             "age": "",
             "billName": "",
             "procResultCd": "",
@@ -365,7 +2395,7 @@ async def fetch_collab_bills_with_selenium():
         }
         
         all_data = []
-        first_response = session.post(url, headers=headers, data=data)
+        first_response = await http_post(url, headers=headers, data=data, cookies=session_cookies)
         
         if first_response.status_code == 200:
             first_result = first_response.json()
@@ -377,7 +2407,7 @@ async def fetch_collab_bills_with_selenium():
             for page in range(2, total_pages + 1):
                 print(f"{page} 페이지 가져오는 중...")
                 data["pageIndex"] = str(page)
-                response = session.post(url, headers=headers, data=data)
+                response = await http_post(url, headers=headers, data=data, cookies=session_cookies)
                 
                 if response.status_code == 200:
                     result = response.json()
@@ -393,7 +2423,7 @@ async def fetch_collab_bills_with_selenium():
         return all_data 
     
     try: 
-        collab_bills = fetch_data()  
+        collab_bills = await fetch_data()
         return collab_bills
 
     except Exception as e:
@@ -401,121 +2431,308 @@ async def fetch_collab_bills_with_selenium():
         return []
 
 
-async def force_fetch_bills_combined(member_name: str):
-    print(f"[force_fetch_bills_combined] Start fetching bills data for member: {member_name}")
+def reusable_bill_details(bill_id, propose_date, watermark, existing):
+    """
+    증분 모드에서 워터마크 이전에 제안됐고 DB에 상세 내용/요약이 있는 의안은 다시 크롤링하지 않는다.
+    재사용할 수 있으면 {"details", "summary"}, 아니면 None.
+    """
+    stored = existing.get((bill_id,))
+    if (watermark is not None
+            and stored is not None
+            and stored["details"]
+            and stored["summary"] not in (None, SUMMARY_ERROR_MESSAGE, SUMMARY_UNAVAILABLE)
+            and (propose_date or "") < watermark):
+        return {"details": stored["details"], "summary": stored["summary"]}
+    return None
 
-    
-    bills = []
-    collab_bills = []
+
+def representative_bill_record(row):
+    return {
+        "type": "대표발의",
+        "bill_id": row.get("BILL_ID"),
+        "bill_name": row.get("BILL_NAME"),
+        "propose_date": row.get("PROPOSE_DT"),
+        "committee": row.get("COMMITTEE"),
+        "proposer": row.get("PROPOSER"),
+        "bill_link": row.get("DETAIL_LINK"),
+        "DETAILS": None,
+        "SUMMARY": None
+    }
+
+
+def collab_bill_record(bill):
+    return {
+        "type": "공동발의",
+        "bill_id": bill.get("billId"),
+        "bill_name": bill.get("billName"),
+        "propose_date": bill.get("proposeDt"),
+        "committee": bill.get("currCommittee"),
+        "proposer": bill.get("proposer"),
+        "bill_link": bill.get("billLinkUrl"),
+        "DETAILS": None,
+        "SUMMARY": None
+    }
+
+
+async def crawl_stage(item):
+    bill = item["bill"]
+    bill_id = bill["bill_id"]
+    known = item["reuse"] or cache.get(f"bill_details_{bill_id}")
+    if known:
+        bill["DETAILS"], bill["SUMMARY"] = known["details"], known["summary"]
+        return item
 
     try:
+        details = await queue_bill_text(bill_id, bill.get("propose_date"))
+        if details is None:
+            bill["DETAILS"], bill["SUMMARY"] = "내용을 찾을 수 없습니다.", SUMMARY_UNAVAILABLE
+        else:
+            bill["DETAILS"] = details
+    except Exception as e:
+        print(f"[crawl_stage] Error while crawling BILL_ID {bill_id}: {e}")
+        bill["DETAILS"], bill["SUMMARY"] = f"크롤링 중 오류 발생: {str(e)}", SUMMARY_UNAVAILABLE
+    return item
+
+
+async def summarize_stage(item):
+    bill = item["bill"]
+    if bill["SUMMARY"] is None:
+        bill["SUMMARY"] = await queue_bill_summary(bill["bill_id"], bill["DETAILS"], bill.get("propose_date"))
+        cache[f"bill_details_{bill['bill_id']}"] = {"details": bill["DETAILS"], "summary": bill["SUMMARY"]}
+    return item
+
+
+async def force_fetch_bills_combined(member_name: str, full: bool = FULL_SYNC):
+    """
+    목록 -> 크롤링 -> 요약 -> 저장 단계를 bounded queue로 이은 파이프라인으로 발의 법안을 수집한다.
+    목록이 도착하는 대로 크롤링을 시작하고, 요약이 끝난 법안은 모아서 바로 DB에 저장한다.
+    """
+    print(f"[force_fetch_bills_combined] Start fetching bills data for member: {member_name} (full={full})")
+
+    rep_source = f"bills_rep:{member_name}"
+    collab_source = f"bills_collab:{member_name}"
+    rep_watermark = None if full else await load_watermark(rep_source)
+    collab_watermark = None if full else await load_watermark(collab_source)
+
+    rep_rows = []
+    raw_collab_bills = []
+    results = {}
+    # total은 목록이 도착할 때마다 늘어난다.
+    progress = {"done": 0, "total": 0}
+    set_partial_results("bills", member_name, progress, lambda member: [results[order] for order in sorted(results)])
+
+    async def produce_representative(put):
+        nonlocal rep_rows
         # 1) 대표발의
         print("[force_fetch_bills_combined] Fetching representative bills...")
-        rep_response = requests.get(bills_url, headers=headers, params={
+        # 발의 법안이 없으면 API가 row 없이 RESULT만 돌려주므로 0건으로 처리한다. 100건이 넘어도 전부 받는다.
+        rep_rows = await fetch_open_api_all(bills_url, "nzmimeepazxkubdpn", {
             "Key": API_KEY,
-            "Type": "json",
-            "pIndex": 1,
-            "pSize": 100,
             "PROPOSER": member_name,
-            "AGE": "22"
+            "AGE": "22",
         })
-        rep_response.raise_for_status()
-
-        rep_data = rep_response.json()
-        rep_rows = rep_data.get("nzmimeepazxkubdpn", [{}])[1].get("row", [])
+        progress["total"] += len(rep_rows)
         print(f"[force_fetch_bills_combined] Found {len(rep_rows)} 대표발의법안")
 
-        for row in rep_rows:
-            bill_id = row.get("BILL_ID")
-            if bill_id:
-                details = await crawl_bill_details(bill_id)
-                bills.append({
-                    "type": "대표발의",
-                    "bill_id": bill_id,
-                    "bill_name": row.get("BILL_NAME"),
-                    "propose_date": row.get("PROPOSE_DT"),
-                    "committee": row.get("COMMITTEE"),
-                    "proposer": row.get("PROPOSER"),
-                    "bill_link": row.get("DETAIL_LINK"),
-                    "DETAILS": details["details"],
-                    "SUMMARY": details["summary"]
+        existing = {}
+        if rep_watermark is not None:
+            existing = await fetch_existing_rows(
+                bill_text_table, ["bill_id"], [(row["BILL_ID"],) for row in rep_rows if row.get("BILL_ID")]
+            )
+        # 최신 의안부터 파이프라인에 넣는다. (응답 순서는 order로 따로 유지)
+        for order, row in sorted(enumerate(rep_rows), key=lambda pair: pair[1].get("PROPOSE_DT") or "", reverse=True):
+            if row.get("BILL_ID"):
+                await put({
+                    "order": (0, order),
+                    "bill": representative_bill_record(row),
+                    "reuse": reusable_bill_details(row["BILL_ID"], row.get("PROPOSE_DT"), rep_watermark, existing),
                 })
 
+    async def produce_collab(put):
+        nonlocal raw_collab_bills
         # 2) 공동발의
         print("[force_fetch_bills_combined] Fetching 공동발의...")
-        raw_collab_bills = await fetch_collab_bills_with_selenium()
+        mona_cd = await resolve_mona_cd(member_name)
+        if mona_cd:
+            raw_collab_bills = await fetch_collab_bills_with_selenium(mona_cd)
+        else:
+            print(f"[force_fetch_bills_combined] monaCd not found for {member_name}. 공동발의 생략.")
+        progress["total"] += len(raw_collab_bills)
         print(f"[force_fetch_bills_combined] Received {len(raw_collab_bills)} 공동발의 from Selenium.")
 
-        for bill in raw_collab_bills:
-            print(f"[force_fetch_bills_combined] Processing 공동 발의: {bill.get('billId')}")
-            bill_id = bill.get("billId")
-            if bill_id:
-                details = await crawl_bill_details(bill_id)
-                collab_bills.append({
-                    "type": "공동발의",
-                    "bill_id": bill_id,
-                    "bill_name": bill.get("billName"),
-                    "propose_date": bill.get("proposeDt"),
-                    "committee": bill.get("currCommittee"),
-                    "proposer": bill.get("proposer"),
-                    "bill_link": bill.get("billLinkUrl"),
-                    "DETAILS": details["details"],
-                    "SUMMARY": details["summary"]
+        existing = {}
+        if collab_watermark is not None:
+            existing = await fetch_existing_rows(
+                bill_text_table, ["bill_id"], [(bill["billId"],) for bill in raw_collab_bills if bill.get("billId")]
+            )
+        for order, bill in sorted(enumerate(raw_collab_bills), key=lambda pair: pair[1].get("proposeDt") or "", reverse=True):
+            if bill.get("billId"):
+                await put({
+                    "order": (1, order),
+                    "bill": collab_bill_record(bill),
+                    "reuse": reusable_bill_details(bill["billId"], bill.get("proposeDt"), collab_watermark, existing),
                 })
-                print(f"[force_fetch_bills_combined] Added 공동 발의: {bill_id}")
 
+    async def produce(put):
+        # 한쪽 목록 수집이 실패하면 다른 쪽도 멈춘 뒤에 파이프라인에 종료 신호를 보낸다.
+        await gather_or_cancel(produce_representative(put), produce_collab(put))
+
+    async def persist_stage(items):
+        # 4) 요약까지 끝난 법안은 모아서 바로 DB 저장
+        for item in items:
+            results[item["order"]] = item["bill"]
+        progress["done"] = len(results)
+        publish_event("progress", {"dataset": "bills", "member": member_name, **progress})
+        await save_bills_to_db([item["bill"] for item in items])
+        await save_member_bills_to_db(member_name, [item["bill"] for item in items])
+
+    pipeline = (
+        IngestPipeline(f"bills:{member_name}")
+        .add_stage("crawl", crawl_stage, concurrency=BILLS_CRAWL_CONCURRENCY)
+        .add_stage("summarize", summarize_stage, concurrency=BILLS_SUMMARIZE_CONCURRENCY)
+        .add_stage("persist", persist_stage, batch_size=BILLS_PERSIST_BATCH_SIZE)
+    )
+    try:
+        await pipeline.run(produce)
     except Exception as e:
+        # 실패한 수집으로 서비스 중인 스냅샷을 바꾸지 않는다. (저장된 일부 결과는 다음 수집 때 재사용)
         print(f"[force_fetch_bills_combined] Error {e}")
+        clear_partial_results("bills", member_name)
+        raise
 
-
-    print(f"공동발의 반환값 출력 \n{collab_bills}")
-    final_bills = bills + collab_bills
+    # 목록 순서(대표발의 -> 공동발의)대로 정리
+    final_bills = [results[order] for order in sorted(results)]
+    collab_count = sum(1 for bill in final_bills if bill["type"] == "공동발의")
     print(f"[force_fetch_bills_combined] Final bills data (combined) count: {len(final_bills)}")
 
     # 공동발의 법안이 포함되었는지 확인
-    if len(collab_bills) > 0:
-        print(f"✅ 공동발의 법안 {len(collab_bills)}건 포함 완료!")
+    if collab_count > 0:
+        print(f"✅ 공동발의 법안 {collab_count}건 포함 완료!")
     else:
         print("❌ 공동발의 법안이 포함되지 않았습니다.")
 
-    # 4) DB 저장
-    await save_bills_to_db(final_bills)
+    # 5) 캐시에 넣어서 빠른 재응답 (중간 결과는 이제 필요 없다)
+    set_member_dataset("bills", member_name, final_bills)
+    clear_partial_results("bills", member_name)
 
-    # 5) 캐시에 넣어서 빠른 재응답
-    cache["bills"] = final_bills
+    # 목록 수집과 저장이 끝난 뒤에만 워터마크를 올린다.
+    await save_watermark(rep_source, max((row.get("PROPOSE_DT") or "" for row in rep_rows), default=""))
+    await save_watermark(collab_source, max((bill.get("proposeDt") or "" for bill in raw_collab_bills), default=""))
     return final_bills
 
 
-async def force_fetch_vote_data(member_name: str):
-    print(f"[force_fetch_vote_data] Start fetching vote data for member: {member_name}")
-    vote_url = "https://open.assembly.go.kr/portal/openapi/nojepdqqaweusdfbi"
-    bill_list_url = "https://open.assembly.go.kr/portal/openapi/nwbpacrgavhjryiph"
-
-    pIndex = 1
-    bill_ids = []
-    has_more_data = True
-
-    # 1) 전체 BILL_ID 수집
-    while has_more_data:
-        print(f"[force_fetch_vote_data] Fetching page {pIndex} for bill IDs...")
-        bill_response = requests.get(bill_list_url, params={
+async def fetch_roll_call(bill_id):
+    """의안 하나의 전체 표결(재석 의원 전원)을 가져온다."""
+    try:
+        return await fetch_open_api_all(vote_url, "nojepdqqaweusdfbi", {
             "Key": os.getenv("API_KEY"),
-            "Type": "json",
+            "BILL_ID": bill_id,
             "AGE": 22,
-            "pSize": 10,
-            "pIndex": pIndex
-        }).json()
-
-        if ("nwbpacrgavhjryiph" in bill_response
-            and len(bill_response["nwbpacrgavhjryiph"]) > 1
-            and "row" in bill_response["nwbpacrgavhjryiph"][1]):
-            rows = bill_response["nwbpacrgavhjryiph"][1]["row"]
-            for row in rows:
-                if "BILL_ID" in row:
-                    bill_ids.append(row["BILL_ID"])
-            pIndex += 1
-        else:
-            has_more_data = False
+        })
+    except Exception as e:
+        print(f"[fetch_roll_call] Error while fetching roll call for BILL_ID {bill_id}: {e}")
+        return []
+
+
+async def build_vote_index(bill_ids, replace=True):
+    """
+    의안별 전체 표결을 한 번씩만 받아 모든 의원의 (bill_id, 의원) -> 투표 인덱스를 만들고
+    DB(votes)에도 저장한다. 상세 내용 크롤링/요약도 의안당 한 번만 수행한다.
+    replace=False면 기존 인덱스를 비우지 않고 새로 받은 의안만 합친다.
+    """
+    new_index = {}
+    all_votes = []
+    voted_bill_ids = []
+    progress = {"done": 0, "total": len(bill_ids)}
+
+    async def index_bill(bill_id):
+        # 의안마다 표결 -> 상세 크롤링이 끝나는 대로 인덱스에 넣어 중간 결과로 보여줄 수 있게 한다.
+        rows = await fetch_roll_call(bill_id)
+        if rows:
+            details = await crawl_bill_details(bill_id, recency=rows[0].get("VOTE_DATE"), bulk=True)
+            voted_bill_ids.append(bill_id)
+            for vote in rows:
+                member = vote.get("HG_NM")
+                if not member or not vote.get("BILL_ID"):
+                    continue
+                vote["DETAILS"] = details
+                new_index.setdefault(member, {})[vote["BILL_ID"]] = vote
+                all_votes.append(vote)
+        progress["done"] += 1
+        publish_progress("votes", progress)
+
+    set_partial_results("votes", "*", progress, lambda member: list(new_index.get(member, {}).values()))
+    try:
+        await asyncio.gather(*[index_bill(bill_id) for bill_id in bill_ids])
+    finally:
+        clear_partial_results("votes", "*")
+
+    # 새 인덱스를 따로 만든 뒤 한 번에 바꿔 끼워서, 갱신 중에도 이전 인덱스를 그대로 읽을 수 있게 한다.
+    if replace:
+        merged_index = {}
+    else:
+        merged_index = {member: dict(member_votes.by_bill) for member, member_votes in vote_index.items()}
+    for member, member_votes in new_index.items():
+        merged_index.setdefault(member, {}).update(member_votes)
+    swap_vote_index(merged_index)
+    print(f"[build_vote_index] Indexed {len(all_votes)} votes for {len(vote_index)} members "
+          f"across {len(voted_bill_ids)} bills.")
+
+    await save_votes_to_db(all_votes)
+    return vote_index
+
+
+def swap_vote_index(new_index):
+    """new_index는 의원명 -> {bill_id: 표결}. 의원별 MemberVotes로 바꿔서 한 번에 교체한다."""
+    global vote_index
+    vote_index = {member: MemberVotes(member_votes.values()) for member, member_votes in new_index.items()}
+    invalidate_snapshots("votes")
+    publish_event("snapshot", {"dataset": "votes", "member": None})
+
+
+def get_member_votes(member_name):
+    """인덱스에서 의원 한 명의 투표 기록을 꺼낸다. 외부 호출 없음."""
+    return vote_index.get(member_name, EMPTY_MEMBER_VOTES)
+
+
+def cached_votes(member_name):
+    if VOTE_FETCH_MODE == "rollcall" and vote_index:
+        return get_member_votes(member_name)
+    return get_member_dataset("votes", member_name)
+
+
+async def force_fetch_vote_data(member_name: str, full: bool = FULL_SYNC):
+    print(f"[force_fetch_vote_data] Start fetching vote data for member: {member_name} (full={full})")
+
+    # 1) 전체 BILL_ID 수집 (큰 페이지 + 동시 요청)
+    bill_rows = await fetch_open_api_all(bill_list_url, "nwbpacrgavhjryiph", {
+        "Key": os.getenv("API_KEY"),
+        "AGE": 22,
+    })
+    bill_rows = [row for row in bill_rows if "BILL_ID" in row]
+
+    # 증분 모드: 워터마크(마지막 처리일) 이후 처리됐거나 아직 DB에 없는 의안만 다시 가져온다.
+    watermark_source = "votes" if VOTE_FETCH_MODE == "rollcall" else f"votes:{member_name}"
+    watermark = None if full else await load_watermark(watermark_source)
+    if watermark is not None:
+        known_bill_ids = await known_vote_bill_ids()
+        bill_rows_to_sync = [
+            row for row in bill_rows
+            if (row.get("PROC_DT") or "") >= watermark or row["BILL_ID"] not in known_bill_ids
+        ]
+    else:
+        bill_rows_to_sync = bill_rows
+    bill_ids = [row["BILL_ID"] for row in bill_rows_to_sync]
+    new_watermark = max((row.get("PROC_DT") or "" for row in bill_rows), default="")
+    print(f"[force_fetch_vote_data] Collected {len(bill_rows)} bill IDs, "
+          f"{len(bill_ids)} to sync (watermark={watermark}).")
+
+    if VOTE_FETCH_MODE == "rollcall":
+        if watermark is not None and not vote_index:
+            await load_vote_index_from_db()
+        await build_vote_index(bill_ids, replace=watermark is None)
+        await save_watermark(watermark_source, new_watermark)
+        return get_member_votes(member_name)
 
     # 2) 각 BILL_ID마다 투표 정보 가져오기
     vote_data = []
@@ -523,13 +2740,13 @@ async def force_fetch_vote_data(member_name: str):
 
     for bill_id in bill_ids:
         print(f"[force_fetch_vote_data] Fetching vote data for BILL_ID: {bill_id}")
-        resp = requests.get(vote_url, params={
+        resp = (await http_get(vote_url, params={
             "Key": os.getenv("API_KEY"),
             "Type": "json",
             "BILL_ID": bill_id,
             "AGE": 22,
             "HG_NM": member_name
-        }).json()
+        })).json()
 
         if (resp
             and "nojepdqqaweusdfbi" in resp
@@ -538,7 +2755,7 @@ async def force_fetch_vote_data(member_name: str):
             for vote in resp["nojepdqqaweusdfbi"][1]["row"]:
                 tasks.append({
                     "vote": vote,
-                    "task": crawl_bill_details(vote["BILL_ID"])
+                    "task": crawl_bill_details(vote["BILL_ID"], recency=vote.get("VOTE_DATE"), bulk=True)
                 })
 
     # 3) 병렬로 상세 정보 처리
@@ -552,20 +2769,173 @@ async def force_fetch_vote_data(member_name: str):
     # 4) DB에 저장
     await save_votes_to_db(vote_data)
 
+    # 5) 증분 모드면 기존 데이터에 새로 받은 표결을 합친다.
+    if watermark is not None:
+        previous = get_member_dataset("votes", member_name) or await load_member_votes_from_db(member_name)
+        merged = {vote["BILL_ID"]: vote for vote in previous}
+        merged.update({vote["BILL_ID"]: vote for vote in vote_data})
+        vote_data = list(merged.values())
+    await save_watermark(watermark_source, new_watermark)
+    set_member_dataset("votes", member_name, vote_data)
+
     print("[force_fetch_vote_data] Final vote data with details:", vote_data)
     return vote_data
 
 
 
 
+async def existing_columns(table_name):
+    if database.url.dialect == "sqlite":
+        rows = await database.fetch_all(query=f"PRAGMA table_info({table_name})")
+        return {row["name"] for row in rows}
+    rows = await database.fetch_all(
+        query="SELECT column_name FROM information_schema.columns WHERE table_name = :table_name",
+        values={"table_name": table_name},
+    )
+    return {row["column_name"] for row in rows}
+
+
+async def existing_indexes(table_name):
+    if database.url.dialect == "sqlite":
+        rows = await database.fetch_all(
+            query="SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :table_name",
+            values={"table_name": table_name},
+        )
+        return {row["name"] for row in rows}
+    rows = await database.fetch_all(
+        query="SELECT indexname FROM pg_indexes WHERE tablename = :table_name",
+        values={"table_name": table_name},
+    )
+    return {row["indexname"] for row in rows}
+
+
+async def migrate_schema():
+    """
+    create_all은 이미 있는 테이블은 건드리지 않으므로,
+    기존 테이블에 빠진 컬럼과 인덱스를 보충한다. 중복 row 정리는 인덱스를 새로 만들 때만 한다.
+    """
+    for table in metadata.sorted_tables:
+        columns = await existing_columns(table.name)
+        for column in table.columns:
+            if column.name not in columns:
+                column_type = column.type.compile(dialect=database_dialect())
+                # 웹/워커가 같은 배포에서 동시에 마이그레이션해도 실패하지 않게 (PostgreSQL)
+                if_not_exists = "" if database.url.dialect == "sqlite" else "IF NOT EXISTS "
+                await database.execute(
+                    query=f"ALTER TABLE {table.name} ADD COLUMN {if_not_exists}{column.name} {column_type}"
+                )
+                print(f"[migrate_schema] Added column {table.name}.{column.name}")
+        indexes = await existing_indexes(table.name)
+        for index in table.indexes:
+            if index.name in indexes:
+                continue
+            unique = "UNIQUE " if index.unique else ""
+            column_names = ", ".join(column.name for column in index.columns)
+            if index.unique:
+                # 예전 코드가 남긴 중복 row가 있으면 가장 오래된 것만 남긴다.
+                await database.execute(
+                    query=f"DELETE FROM {table.name} WHERE id NOT IN "
+                          f"(SELECT MIN(id) FROM {table.name} GROUP BY {column_names})"
+                )
+            await database.execute(
+                query=f"CREATE {unique}INDEX IF NOT EXISTS {index.name} ON {table.name} ({column_names})"
+            )
+            print(f"[migrate_schema] Created index {index.name}")
+
+
+def database_dialect():
+    if database.url.dialect == "sqlite":
+        return sqlite.dialect()
+    return postgresql.dialect()
+
+
+async def prepare_schema():
+    """
+    테이블/컬럼/인덱스를 준비한다. 동기 엔진(create_engine + create_all)을 따로 만들지 않고
+    이미 연결된 비동기 DB로 CREATE TABLE IF NOT EXISTS를 실행한다.
+    """
+    for table in metadata.sorted_tables:
+        ddl = CreateTable(table, if_not_exists=True).compile(dialect=database_dialect())
+        await database.execute(query=str(ddl))
+    await migrate_schema()
+    await backfill_member_bills()
+    schema_ready_event().set()
+
+
+def schema_ready_event():
+    # 이벤트 루프가 뜬 뒤에 만들어야 하므로 처음 쓸 때 만든다.
+    if startup_state["schema_ready"] is None:
+        startup_state["schema_ready"] = asyncio.Event()
+    return startup_state["schema_ready"]
+
+
+async def wait_for_schema():
+    await schema_ready_event().wait()
+
+
+def schema_is_ready():
+    return startup_state["schema_ready"] is not None and startup_state["schema_ready"].is_set()
+
+
+def record_startup_timing(stage, started):
+    startup_timings[stage] = round((time.perf_counter() - started) * 1000, 1)
+
+
+async def prepare_schema_with_retry():
+    """
+    스키마 준비가 실패하면(DB 일시 장애, 다른 프로세스와 동시 마이그레이션 등) 점점 길게 쉬면서 다시 시도한다.
+    준비가 끝나야 wait_for_schema()에서 기다리는 요청들이 풀린다.
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            await prepare_schema()
+            return
+        except Exception as e:
+            delay = min(2 ** attempt, SCHEMA_RETRY_MAX_SECONDS)
+            print(f"[prepare_schema] 스키마 준비 실패 (attempt={attempt}), {delay}초 후 재시도: {e}")
+            await asyncio.sleep(delay)
+
+
+async def initialize_data():
+    """
+    스키마 준비, DB 스냅샷 warm start, 라이브 수집을 백그라운드에서 차례로 진행한다.
+    서버는 이 작업을 기다리지 않고 바로 요청을 받는다.
+    """
+    try:
+        started = time.perf_counter()
+        await prepare_schema_with_retry()
+        record_startup_timing("schema", started)
+        if INGEST_IN_WEB:
+            # 이 프로세스가 votes를 쓰는 경우에만 통계 테이블을 (비어 있으면) 채운다. 아니면 워커가 한다.
+            await rebuild_vote_stats()
+
+        # DB에 남아 있는 마지막 데이터로 바로 응답할 수 있게 한 뒤, 라이브 수집은 백그라운드로
+        started = time.perf_counter()
+        await warm_start()
+        record_startup_timing("warm_start", started)
+        print(f"[initialize_data] Startup timings (ms): {startup_timings}")
+    except Exception as e:
+        print(f"[initialize_data] 초기화 오류 발생: {e}")
+        return
+    if INGEST_IN_WEB:
+        asyncio.create_task(preload_data())
+    asyncio.create_task(refresh_scheduler())
+
+
 # DB 연결: startup / shutdown
 @app.on_event("startup")
 async def startup_event():
     print("[startup_event] 서버 시작 - DB 연결 및 초기화...")
+    started = time.perf_counter()
+    await open_http_client()
     await database.connect()
-    engine = create_engine(DATABASE_URL)
-    metadata.create_all(engine)
-    asyncio.create_task(preload_data())
+    record_startup_timing("db_connect", started)
+    # 스키마 준비와 warm start는 요청 처리를 막지 않도록 백그라운드로
+    asyncio.create_task(initialize_data())
+    startup_timings["ready"] = round((time.perf_counter() - MODULE_LOAD_STARTED) * 1000, 1)
+    print(f"[startup_event] Ready. Startup timings (ms): {startup_timings}")
 
     # ✅ 1시간 간격으로 요약 실패 재처리
     # @repeat_every(seconds=3600)  # 1시간마다 실행
@@ -595,13 +2965,29 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     print("[shutdown_event] 서버 종료 - DB 연결 해제...")
+    await close_http_client()
     await database.disconnect()
 
 @app.get("/status")
 async def check_status():
     return {
         "vote_data_loaded": vote_data_loaded,
-        "bills_data_loaded": bills_data_loaded
+        "bills_data_loaded": bills_data_loaded,
+        "vote_data_stale": data_stale["votes"],
+        "bills_data_stale": data_stale["bills"],
+        "datasets": {dataset: dataset_status(dataset) for dataset in ("votes", "bills")},
+        "last_refresh_date": str(last_refresh_date) if last_refresh_date else None,
+        "refresh": refresh_state,
+        "summarizer": summary_limiter.stats(),
+        "work_queues": {queue.name: queue.stats() for queue in (crawl_queue, summary_queue)},
+        "vote_index": {
+            "members": len(vote_index),
+            "votes": sum(len(member_votes) for member_votes in vote_index.values()),
+            "bills": len(shared_vote_details),
+        },
+        "pipelines": {name: pipeline.stats() for name, pipeline in pipeline_stats.items()},
+        "schema_ready": schema_is_ready(),
+        "startup": startup_timings,
     }
 
 
@@ -620,61 +3006,194 @@ async def root():
 
 # Votes API
 @app.get("/api/vote_data")
-async def fetch_vote_data(member_name: str = Query(..., description="Name of the member")):
+async def fetch_vote_data(
+    request: Request,
+    member_name: str = Query(..., description="Name of the member"),
+    view: str = Query("summary", description="summary | full"),
+    fields: str = Query(None, description="Comma separated field names"),
+    result: str = Query(None, description="찬성/반대/기권 (comma separated)"),
+    committee: str = Query(None, description="CURR_COMMITTEE"),
+    date_from: str = Query(None, description="YYYYMMDD or YYYY-MM-DD"),
+    date_to: str = Query(None, description="YYYYMMDD or YYYY-MM-DD"),
+    limit: int = Query(None, ge=1, le=VOTE_PAGE_MAX_LIMIT),
+    cursor: str = Query(None, description="next_cursor of the previous page"),
+    format: str = Query(None, description="json | ndjson"),
+):
     print(f"[fetch_vote_data] Request with member_name={member_name}")
-    global last_refresh_date, vote_data_loaded
-
-    current_time = datetime.now()
-    current_date = current_time.date()
+    view, fields = parse_list_options(view, fields)
+    results = {value.strip() for value in (result or "").split(",") if value.strip()}
+    filtered = bool(results or committee or date_from or date_to or limit or cursor)
+    matches = vote_filter(results, committee, date_from, date_to)
+    ndjson = wants_ndjson(request, format)
 
     if not vote_data_loaded:
-        response = {"message": "loading"}
-        print(f"[fetch_vote_data] Response: {response}")
-        return response
-
-    # 캐시에 있으면 캐시 반환
-    if "votes" in cache:
-        if last_refresh_date == current_date:
-            response = cache["votes"]
-            print(f"[fetch_vote_data] Returning cached vote data. size={len(response)}")
-            return response
-
-        if is_refresh_time(current_time):
-            print("[fetch_vote_data] Refresh time. Fetching new vote data...")
-            votes = await force_fetch_vote_data(member_name)
-            cache["votes"] = votes
-            last_refresh_date = current_date
-            return votes
-        else:
-            return cache["votes"]
+        # 투표 수집이 아직 안 끝났으면 지금까지 모인 결과를 complete: false로 보여준다.
+        return partial_or_loading(request, "votes", member_name, view, fields)
+
+    # 캐시(또는 투표 인덱스)에 있으면 캐시 반환. 갱신은 refresh_scheduler가 백그라운드에서 한다.
+    votes = cached_votes(member_name)
+    if votes is not None:
+        if not votes:
+            # rollcall 인덱스에 없는 이름이면 빈 목록 대신 다른 API처럼 404로 알린다.
+            await require_member(member_name)
+        print(f"[fetch_vote_data] Returning cached vote data. size={len(votes)}")
     else:
-        return {"message": "loading"}
+        # 처음 요청된 의원이면 백그라운드로 불러오기 시작하고, DB에 남은 데이터가 있으면 먼저 보여준다.
+        await require_member(member_name)
+        start_member_load("votes", member_name)
+        if ndjson:
+            # 스트리밍이면 전체를 메모리에 올리지 않고 DB 커서에서 바로 내보낸다.
+            return ndjson_response(stream_db_records(
+                "votes", member_votes_query(member_name), vote_record_from_row,
+                after_cursor(matches, cursor), view, fields, limit,
+            ))
+        votes = await load_member_votes_from_db(member_name)
+        if not votes:
+            return partial_or_loading(request, "votes", member_name, view, fields)
+        # 그 사이 라이브 수집이 먼저 끝났으면 그 결과를 덮어쓰지 않는다.
+        if get_member_dataset("votes", member_name) is None:
+            set_member_dataset("votes", member_name, votes)
+        votes = get_member_dataset("votes", member_name)
+
+    if ndjson:
+        source = votes
+        if filtered:
+            keep = after_cursor(matches, cursor)
+            source = (vote for vote in votes.ordered(results) if keep(vote))
+        records = (project_record("votes", vote, view, fields) for vote in source)
+        return ndjson_response(itertools.islice(records, limit))
+
+    if not filtered:
+        return snapshot_response(request, get_response_snapshot("votes", member_name, votes, view, fields))
+
+    if limit is None and cursor is None:
+        # 필터만 있으면 기존처럼 배열로 준다.
+        data = [vote for vote in votes.ordered(results) if matches(vote)]
+        return json_response(request, [project_record("votes", vote, view, fields) for vote in data])
+
+    page, next_cursor = vote_page(votes, matches, limit or VOTE_PAGE_MAX_LIMIT, cursor, results)
+    return json_response(request, {
+        "data": [project_record("votes", vote, view, fields) for vote in page],
+        "next_cursor": next_cursor,
+    })
 
 
 # Bills API
 @app.get("/api/bills_combined")
-async def fetch_bills_combined(member_name: str = Query(...)):
+async def fetch_bills_combined(
+    request: Request,
+    member_name: str = Query(...),
+    view: str = Query("summary", description="summary | full"),
+    fields: str = Query(None, description="Comma separated field names"),
+    format: str = Query(None, description="json | ndjson"),
+):
     print(f"[fetch_bills_combined] Request with member_name={member_name}")
-    global last_refresh_date, bills_data_loaded
-
-    current_time = datetime.now()
-    current_date = current_time.date()
-
-    if not bills_data_loaded:
-        return {"message": "loading"}
-
-    # 캐시에 있으면 우선 반환
-    if "bills" in cache:
-        if last_refresh_date == current_date:
-            return cache["bills"]
-
-        if is_refresh_time(current_time):
-            print("[fetch_bills_combined] It's refresh time (4 AM). Fetching new bills data...")
-            bills = await force_fetch_bills_combined(member_name)
-            cache["bills"] = bills
-            last_refresh_date = current_date
-            return bills
-        else:
-            return cache["bills"]
+    view, fields = parse_list_options(view, fields)
+    ndjson = wants_ndjson(request, format)
+
+    # 캐시에 있으면 우선 반환. 갱신은 refresh_scheduler가 백그라운드에서 한다.
+    bills = get_member_dataset("bills", member_name)
+    if bills is not None:
+        if ndjson:
+            return ndjson_response(project_record("bills", bill, view, fields) for bill in bills)
+        return snapshot_response(request, get_response_snapshot("bills", member_name, bills, view, fields))
     else:
+        # 처음 요청된 의원이면 백그라운드로 불러오기 시작하고, DB에 남은 데이터가 있으면 먼저 보여준다.
+        await require_member(member_name)
+        start_member_load("bills", member_name)
+        if not schema_is_ready():
+            return {"message": "loading"}
+        if ("bills", member_name) in partial_results and not ndjson:
+            # 수집 중에는 DB에 일부만 저장돼 있으므로 완성본처럼 캐시하지 않고 중간 결과로 보여준다.
+            return partial_or_loading(request, "bills", member_name, view, fields)
+        if ndjson:
+            return ndjson_response(stream_db_records(
+                "bills", member_bills_query(member_name), bill_record_from_row, view=view, fields=fields,
+            ))
+        bills = await load_member_bills_from_db(member_name)
+        if bills:
+            # 그 사이 라이브 수집이 먼저 끝났으면 그 결과를 덮어쓰지 않는다.
+            if get_member_dataset("bills", member_name) is None:
+                set_member_dataset("bills", member_name, bills)
+            bills = get_member_dataset("bills", member_name)
+            return snapshot_response(request, get_response_snapshot("bills", member_name, bills, view, fields))
+        return partial_or_loading(request, "bills", member_name, view, fields)
+
+
+# 의안 본문/요약 API (목록은 요약만 내려주므로 본문은 필요할 때 여기서 받는다)
+@app.get("/api/bill_details")
+async def fetch_bill_details(request: Request, bill_id: str = Query(...)):
+    print(f"[fetch_bill_details] Request with bill_id={bill_id}")
+    if not schema_is_ready():
+        return {"message": "loading"}
+    details = await load_bill_details(bill_id)
+    if details is None:
+        if not INGEST_IN_WEB:
+            raise HTTPException(status_code=404, detail="Bill not found")
+        # 사용자가 직접 연 의안은 대기 중인 수집 작업보다 먼저 처리한다.
+        details = await crawl_bill_details(bill_id, requested=True)
+    return json_response(request, {"bill_id": bill_id, **details})
+
+
+# 표결 통계 API (차트용 집계만 내려준다)
+@app.get("/api/vote_stats")
+async def fetch_vote_stats(request: Request, member_name: str = Query(...)):
+    print(f"[fetch_vote_stats] Request with member_name={member_name}")
+    if not schema_is_ready():
         return {"message": "loading"}
+    stats = await load_vote_stats(member_name)
+    if not stats["total"] and await resolve_mona_cd(member_name):
+        # 아직 수집되지 않은 (의원 목록에 있는) 의원이면 수집을 시작한다.
+        start_member_load("votes", member_name)
+    return json_response(request, stats)
+
+
+# 데이터 준비/진행/스냅샷 갱신 알림 (Server-Sent Events). /status 폴링 대신 쓴다.
+@app.get("/api/events")
+async def stream_events(request: Request, member_name: str = Query(DEFAULT_MEMBER)):
+    queue = asyncio.Queue(maxsize=SSE_QUEUE_SIZE)
+    event_subscribers.add(queue)
+    sent_etags = {}
+
+    def snapshot_messages(datasets):
+        # 같은 ETag는 다시 보내지 않는다. 클라이언트는 ETag가 바뀔 때만 목록을 다시 받으면 된다.
+        for dataset in datasets:
+            etag = current_snapshot_etag(dataset, member_name)
+            if etag is not None and sent_etags.get(dataset) != etag:
+                sent_etags[dataset] = etag
+                yield sse_message("snapshot", {"dataset": dataset, "member": member_name, "etag": etag})
+
+    async def body():
+        try:
+            yield sse_message("status", {
+                "vote_data_loaded": vote_data_loaded,
+                "bills_data_loaded": bills_data_loaded,
+                "refresh": refresh_progress(),
+            })
+            for message in snapshot_messages(("votes", "bills")):
+                yield message
+            while not await request.is_disconnected():
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                if event == "snapshot":
+                    if data["member"] not in (None, member_name):
+                        continue
+                    for message in snapshot_messages((data["dataset"],)):
+                        yield message
+                    continue
+                yield sse_message(event, data)
+                if event == "ready":
+                    for message in snapshot_messages((data["dataset"],)):
+                        yield message
+        finally:
+            event_subscribers.discard(queue)
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
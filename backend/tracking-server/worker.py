@@ -0,0 +1,85 @@
+"""
+수집 전용 워커.
+웹 서버(server.py)와 같은 DB를 쓰면서 법안 목록 수집 / 크롤링 / 요약 / 저장만 담당한다.
+웹 프로세스는 INGEST_IN_WEB=0으로 띄우면 DB만 읽는다.
+
+실행 경로 : `cd backend/tracking-server`
+- 계속 실행 (매일 REFRESH_HOUR 시에 전체 수집, 그 사이에는 새로 요청된 의원만 바로 수집): `python worker.py`
+- 한 번만 수집하고 종료: `python worker.py --once`
+- 워터마크 무시하고 전체 재수집: `python worker.py --once --full`
+- 예전 컬럼의 의안 본문을 bill_text로 옮기고 표결 통계를 다시 센 뒤 종료 (배포 후 한 번): `python worker.py --migrate`
+"""
+import argparse
+import asyncio
+import os
+from datetime import datetime
+
+import server
+
+# 전체 수집 사이에 웹에서 새로 요청된 의원(tracked_members)이 있는지 확인하는 간격
+TRACKED_MEMBER_POLL_SECONDS = int(os.getenv("TRACKED_MEMBER_POLL_SECONDS", "120"))
+
+
+async def ingest_once(full):
+    # 기본 의원 + 웹에서 요청된 의원들을 수집한다.
+    members = await server.load_tracked_members()
+    print(f"[worker] Ingest start (full={full}, members={len(members) + 1})")
+    await server.refresh_all(full=full, extra_members=members)
+    print(f"[worker] Ingest done: {server.refresh_state}")
+    return members
+
+
+async def ingest_new_members(known):
+    """
+    지난 수집 이후 웹에서 처음 요청된 의원만 바로 수집한다. (다음 REFRESH_HOUR까지 loading으로 두지 않게)
+    rollcall 모드의 투표는 전체 수집 때 이미 모든 의원 것을 저장하므로 발의 법안만 가져온다.
+    """
+    new_members = [member for member in await server.load_tracked_members() if member not in known]
+    datasets = ["bills"] if server.VOTE_FETCH_MODE == "rollcall" else ["votes", "bills"]
+    for member in new_members:
+        print(f"[worker] New tracked member: {member}")
+        for dataset in datasets:
+            try:
+                await server.load_member_dataset(dataset, member)
+            except Exception as e:
+                print(f"[worker] {dataset}:{member} 수집 오류: {e}")
+        known.add(member)
+
+
+async def run_worker(once, full, migrate=False):
+    await server.open_http_client()
+    await server.database.connect()
+    try:
+        await server.prepare_schema()
+        if migrate:
+            await server.backfill_bill_text()
+            await server.rebuild_vote_stats(force=True)
+            return
+        # 통계 테이블이 비어 있으면 (처음 배포) votes에서 한 번 채운다.
+        await server.rebuild_vote_stats()
+        while True:
+            known = set(await ingest_once(full))
+            if once:
+                break
+            next_run = server.next_refresh_time(datetime.now())
+            print(f"[worker] Next ingest at {next_run}")
+            while datetime.now() < next_run:
+                remaining = (next_run - datetime.now()).total_seconds()
+                await asyncio.sleep(max(0, min(TRACKED_MEMBER_POLL_SECONDS, remaining)))
+                await ingest_new_members(known)
+    finally:
+        await server.close_http_client()
+        await server.database.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Co-Deep tracking-server ingest worker")
+    parser.add_argument("--once", action="store_true", help="한 번만 수집하고 종료")
+    parser.add_argument("--full", action="store_true", help="워터마크를 무시하고 전체 재수집")
+    parser.add_argument("--migrate", action="store_true", help="예전 본문 컬럼을 bill_text로 옮기고 표결 통계를 다시 센 뒤 종료")
+    args = parser.parse_args()
+    asyncio.run(run_worker(args.once, args.full, args.migrate))
+
+
+if __name__ == "__main__":
+    main()
@@ -25,31 +25,29 @@ const Seoin = () => {
   const ITEMS_PER_PAGE = 3;
   const memberName = "곽상언";
 
-  // ✅ 서버에 한 번만 데이터를 요청하는 useEffect
+  // ✅ 서버가 보내는 이벤트(SSE)로 데이터가 준비되거나 바뀌었을 때만 요청
   useEffect(() => {
-    const fetchData = async () => {
-      try {
-        // 상태 체크
-        const statusResponse = await fetch(`${process.env.REACT_APP_BACKEND_URL}/status`);
-        const status = await statusResponse.json();
-        console.log("서버 상태 확인:", status);
-
-        if (status.vote_data_loaded && status.bills_data_loaded) {
-          console.log("모든 데이터 로드 완료");
-
-          // ✅ 투표 데이터와 법안 데이터 fetch
-          await fetchVotesFromServer();
-          await fetchBillsFromServer();
-        } else {
-          console.log("데이터가 아직 로드되지 않았습니다.");
-        }
-      } catch (error) {
-        console.error("데이터 로드 중 오류 발생:", error);
-      }
+    const etags = {};
+    const events = new EventSource(
+      `${process.env.REACT_APP_BACKEND_URL}/api/events?member_name=${memberName}`
+    );
+
+    // ✅ 스냅샷 ETag가 바뀐 데이터셋만 다시 fetch
+    events.addEventListener("snapshot", (event) => {
+      const { dataset, etag } = JSON.parse(event.data);
+      if (etags[dataset] === etag) return;
+      etags[dataset] = etag;
+      if (dataset === "votes") fetchVotesFromServer();
+      if (dataset === "bills") fetchBillsFromServer();
+    });
+    events.addEventListener("progress", (event) => {
+      console.log("데이터 수집 진행:", JSON.parse(event.data));
+    });
+    events.onerror = (error) => {
+      console.error("서버 이벤트 연결 오류:", error);
     };
 
-    // ✅ 컴포넌트가 로드될 때 한 번만 fetch 실행
-    fetchData();
+    return () => events.close();
   }, []);
 
   // ✅ Votes 데이터 Fetch 함수
@@ -61,9 +59,11 @@ const Seoin = () => {
       );
       const data = await response.json();
       console.log("Received votes data:", data);
-      setVotes(data);
+      // 수집 중이면 { data, complete: false, progress } 형태로 온다.
+      const records = Array.isArray(data) ? data : data.data || [];
+      setVotes(records);
       if (activeTab === "votes") {
-        setDisplayData(data.slice(0, ITEMS_PER_PAGE));
+        setDisplayData(records.slice(0, ITEMS_PER_PAGE));
       }
     } catch (error) {
       console.error("서버 요청 오류:", error);
@@ -80,7 +80,8 @@ const Seoin = () => {
       );
       const data = await response.json();
       console.log("Received bills data:", data);
-      const sortedBills = data.sort(
+      const records = Array.isArray(data) ? data : data.data || [];
+      const sortedBills = records.sort(
         (a, b) => new Date(b.propose_date) - new Date(a.propose_date)
       );
       setBills(sortedBills);